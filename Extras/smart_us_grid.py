@@ -1,33 +1,184 @@
+"""
+Build search points over the U.S. as a hex (offset row) grid.
+
+Rows are SPACING_KM * sqrt(3)/2 apart and every other row is shifted by
+half a step, so each point is SPACING_KM from its six neighbors. The
+longitude step is widened by 1/cos(lat) row by row, so points stay
+SPACING_KM apart on the ground at every latitude instead of bunching up
+in the north like a fixed degree step does.
+
+Every point becomes a paid search, so points can be dropped with:
+- --mask: a GeoJSON file of (Multi)Polygons, e.g. U.S. land or states.
+  Only points inside are kept.
+- --raster: an ESRI ASCII grid (.asc), e.g. population density.
+  Points on cells below --min-density, or on no-data cells, are dropped.
+
+Points are generated and written to CSV a band of rows at a time.
+
+run with: python Extras/smart_us_grid.py --mask us_land.geojson --raster density.asc --min-density 5
+"""
+import argparse
 import csv
+import json
+import math
+import numpy as np
 
 # U.S. bounds
 LAT_START = 25.0
 LAT_END = 49.0
 LNG_START = -125.0
 LNG_END = -66.0
-SPACING_DEG = 0.27  # ~30km
+SPACING_KM = 30.0
+
+KM_PER_DEG_LAT = 111.32
+# Grid rows generated and written per chunk
+CHUNK_ROWS = 64
 
 OUTPUT_FILE = "grid_points.csv"
 
-def generate_us_grid(lat_start, lat_end, lng_start, lng_end, spacing_deg):
-    coords = []
-    lat = lat_start
-    while lat <= lat_end:
-        lng = lng_start
-        while lng <= lng_end:
-            coords.append((round(lat, 4), round(lng, 4)))
-            lng += spacing_deg
-        lat += spacing_deg
-    return coords
-
-def save_grid_to_csv(coords, filename=OUTPUT_FILE):
+def generate_us_grid(lat_start, lat_end, lng_start, lng_end, spacing_km, chunk_rows=CHUNK_ROWS):
+    """Yield (lats, lngs) arrays of hex grid points, chunk_rows grid rows at a time"""
+    row_step = spacing_km * math.sqrt(3) / 2 / KM_PER_DEG_LAT
+    row_lats = lat_start + row_step * np.arange(int(math.floor((lat_end - lat_start) / row_step)) + 1)
+    lng_middle = (lng_start + lng_end) / 2
+
+    for first in range(0, len(row_lats), chunk_rows):
+        lats = row_lats[first:first + chunk_rows]
+        lng_steps = spacing_km / (KM_PER_DEG_LAT * np.maximum(np.cos(np.radians(lats)), 0.01))
+        # Odd rows are shifted half a step, which makes the grid hexagonal. Rows are laid out
+        # from the middle longitude so the drift between rows of different step stays small.
+        shifts = np.where((first + np.arange(len(lats))) % 2 == 1, 0.5, 0.0)
+        first_steps = np.ceil((lng_start - lng_middle) / lng_steps - shifts)
+        counts = (np.floor((lng_end - lng_middle) / lng_steps - shifts) - first_steps).astype(int) + 1
+
+        row_index = np.repeat(np.arange(len(lats)), counts)
+        position = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        steps = first_steps[row_index] + shifts[row_index] + position
+        yield lats[row_index], lng_middle + steps * lng_steps[row_index]
+
+def load_polygon_mask(path):
+    """Every ring of every Polygon/MultiPolygon in a GeoJSON file, as (lng, lat) arrays"""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("type") == "FeatureCollection":
+        geometries = [feature["geometry"] for feature in data["features"] if feature.get("geometry")]
+    elif data.get("type") == "Feature":
+        geometries = [data["geometry"]]
+    else:
+        geometries = [data]
+
+    rings = []
+    for geometry in geometries:
+        if geometry["type"] == "Polygon":
+            polygons = [geometry["coordinates"]]
+        elif geometry["type"] == "MultiPolygon":
+            polygons = geometry["coordinates"]
+        else:
+            continue
+        for polygon in polygons:
+            rings.extend(np.asarray(ring, dtype=float)[:, :2] for ring in polygon)
+    return rings
+
+def points_in_rings(lats, lngs, rings):
+    """
+    Even-odd ray casting against all rings at once, vectorized over the
+    points. Holes and separate polygons both fall out of the parity.
+    """
+    inside = np.zeros(len(lats), dtype=bool)
+    for ring in rings:
+        low_lng, low_lat = ring.min(axis=0)
+        high_lng, high_lat = ring.max(axis=0)
+        near = np.flatnonzero((lats >= low_lat) & (lats <= high_lat) & (lngs >= low_lng) & (lngs <= high_lng))
+        if not len(near):
+            continue
+        px, py = lngs[near], lats[near]
+        crossings = np.zeros(len(near), dtype=bool)
+        x1, y1 = ring[:-1, 0], ring[:-1, 1]
+        x2, y2 = ring[1:, 0], ring[1:, 1]
+        for ax, ay, bx, by in zip(x1, y1, x2, y2):
+            if ay == by:
+                continue
+            crosses = (ay > py) != (by > py)
+            crossings ^= crosses & (px < (bx - ax) * (py - ay) / (by - ay) + ax)
+        inside[near] ^= crossings
+    return inside
+
+def load_density_raster(path):
+    """ESRI ASCII grid: the header values plus the cell values as a 2D array (top row first)"""
+    header = {}
+    with open(path, encoding="utf-8") as f:
+        while True:
+            position = f.tell()
+            line = f.readline()
+            key, _, value = line.strip().partition(" ")
+            if not key or not key[0].isalpha():
+                f.seek(position)
+                break
+            header[key.lower()] = float(value)
+        values = np.loadtxt(f, dtype=np.float32, ndmin=2)
+
+    cellsize = header["cellsize"]
+    # Center-registered grids give the middle of the lower left cell instead of its corner
+    left = header.get("xllcorner", header.get("xllcenter", 0.0) - cellsize / 2)
+    bottom = header.get("yllcorner", header.get("yllcenter", 0.0) - cellsize / 2)
+    return {
+        "values": values,
+        "left": left,
+        "top": bottom + values.shape[0] * cellsize,
+        "cellsize": cellsize,
+        "nodata": header.get("nodata_value"),
+    }
+
+def raster_values(raster, lats, lngs):
+    """Raster value under each point; NaN outside the grid or on no-data cells"""
+    values = raster["values"]
+    rows = np.floor((raster["top"] - lats) / raster["cellsize"]).astype(int)
+    cols = np.floor((lngs - raster["left"]) / raster["cellsize"]).astype(int)
+    on_grid = (rows >= 0) & (rows < values.shape[0]) & (cols >= 0) & (cols < values.shape[1])
+
+    sampled = np.full(len(lats), np.nan, dtype=np.float32)
+    sampled[on_grid] = values[rows[on_grid], cols[on_grid]]
+    if raster["nodata"] is not None:
+        sampled[sampled == raster["nodata"]] = np.nan
+    return sampled
+
+def filter_points(chunks, rings=None, raster=None, min_density=0.0):
+    """Drop points outside the mask rings or on raster cells below min_density"""
+    for lats, lngs in chunks:
+        keep = np.ones(len(lats), dtype=bool)
+        if raster is not None:
+            # NaN compares False, so no-data cells and points off the raster are dropped too
+            keep &= raster_values(raster, lats, lngs) >= min_density
+        if rings is not None:
+            keep[keep] = points_in_rings(lats[keep], lngs[keep], rings)
+        yield lats[keep], lngs[keep]
+
+def save_grid_to_csv(chunks, filename=OUTPUT_FILE):
+    """Stream (lats, lngs) chunks to the CSV; returns the number of points written"""
+    total = 0
     with open(filename, mode="w", newline="", encoding="utf-8") as f:
         writer = csv.writer(f)
         writer.writerow(["lat", "lng"])
-        for lat, lng in coords:
-            writer.writerow([lat, lng])
-    print(f"✅ Saved {len(coords)} grid points to {filename}")
+        for lats, lngs in chunks:
+            writer.writerows(zip(np.round(lats, 4).tolist(), np.round(lngs, 4).tolist()))
+            total += len(lats)
+    print(f"✅ Saved {total} grid points to {filename}")
+    return total
 
 if __name__ == "__main__":
-    grid = generate_us_grid(LAT_START, LAT_END, LNG_START, LNG_END, SPACING_DEG)
-    save_grid_to_csv(grid)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--spacing-km", type=float, default=SPACING_KM, help="distance between neighboring points")
+    parser.add_argument("--bounds", type=float, nargs=4, metavar=("LAT_START", "LAT_END", "LNG_START", "LNG_END"),
+                        default=[LAT_START, LAT_END, LNG_START, LNG_END])
+    parser.add_argument("--mask", help="GeoJSON (Multi)Polygons to keep points inside")
+    parser.add_argument("--raster", help="ESRI ASCII grid (.asc) of e.g. population density")
+    parser.add_argument("--min-density", type=float, default=0.0, help="drop points on raster cells below this")
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    grid = generate_us_grid(*args.bounds, args.spacing_km)
+    if args.mask or args.raster:
+        rings = load_polygon_mask(args.mask) if args.mask else None
+        raster = load_density_raster(args.raster) if args.raster else None
+        grid = filter_points(grid, rings, raster, args.min_density)
+    save_grid_to_csv(grid, args.output)
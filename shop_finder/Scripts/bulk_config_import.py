@@ -0,0 +1,110 @@
+"""
+Queue searches in bulk: every point of a grid CSV (like the one
+Extras/smart_us_grid.py writes) crossed with every query.
+
+Planned searches already in search_log, optimal_radii or search_config
+are left out. A search matches when the query, the point (rounded to
+KEY_DIGITS decimals) and the radius are the same. The rest are appended
+to search_config in one write.
+
+Run it between searches: shopFinder rewrites search_config at the end of
+a run from what it loaded at the start.
+
+run with: python -m shop_finder.Scripts.bulk_config_import Extras/grid_points.csv --query "witch store" --radius 25000
+"""
+import argparse
+import csv
+import time
+
+from shop_finder.Scripts.search_config_store import parse_cell, to_int
+from shop_finder.Scripts.storage import get_table
+
+# Decimal places of lat/lng compared when deduping (~11 m)
+KEY_DIGITS = 4
+DEFAULT_CITY = "grid"
+
+
+def search_key(query, lat, lng, radius):
+    """Dedupe key of a search, or None if lat, lng or radius does not parse"""
+    lat, lng, radius = parse_cell(float, lat), parse_cell(float, lng), parse_cell(to_int, radius)
+    if None in (lat, lng, radius):
+        return None
+    return (query, round(lat, KEY_DIGITS), round(lng, KEY_DIGITS), radius)
+
+
+def known_searches():
+    """
+    Keys of every search already logged, saved as an optimal radius or
+    configured; rows with a blank or bad lat, lng or radius (allowed on
+    skipped search_config rows) are left out
+    """
+    keys = {search_key(row["query"], row["lat"], row["lng"], row["radius_m"]) for row in get_table("search_log").rows()}
+    for name in ("optimal_radii", "search_config"):
+        keys.update(search_key(row["query"], row["lat"], row["lng"], row["radius"]) for row in get_table(name).rows())
+    keys.discard(None)
+    return keys
+
+
+def read_grid(grid_file, city=DEFAULT_CITY):
+    """(city, lat, lng) per grid point; a city column in the grid wins over the default"""
+    with open(grid_file, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            yield row.get("city") or city, row["lat"], row["lng"]
+
+
+def plan_config_rows(points, queries, radius, known):
+    """
+    search_config rows for every point and query not in known (which is
+    updated, so repeats within the import are dropped too); returns the
+    rows and the number skipped
+    """
+    rows = []
+    skipped = 0
+    for city, lat, lng in points:
+        lat, lng = round(float(lat), KEY_DIGITS), round(float(lng), KEY_DIGITS)
+        for query in queries:
+            key = (query, lat, lng, radius)
+            if key in known:
+                skipped += 1
+                continue
+            known.add(key)
+            rows.append({
+                "Skip?": "No", "Status": "", "city": city,
+                "lat": str(lat), "lng": str(lng), "radius": str(radius), "query": query
+            })
+    return rows, skipped
+
+
+def import_grid(grid_file, queries, radius, city=DEFAULT_CITY, dry_run=False):
+    """Cross the grid with the queries and append the new searches to search_config"""
+    start = time.perf_counter()
+    known = known_searches()
+    print(f"📥 Loaded {len(known)} known searches")
+
+    rows, skipped = plan_config_rows(read_grid(grid_file, city), queries, int(radius), known)
+    if not dry_run:
+        get_table("search_config").append(rows)
+
+    action = "Would queue" if dry_run else "Queued"
+    print(f"✅ {action} {len(rows)} new searches, skipped {skipped} already known "
+          f"({time.perf_counter() - start:.1f}s)")
+    return len(rows), skipped
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("grid_file", help="CSV with lat and lng columns (and optionally city)")
+    parser.add_argument("--query", action="append", default=[], help="search query, repeat for several")
+    parser.add_argument("--queries-file", help="file with one query per line")
+    parser.add_argument("--radius", type=int, default=25000, help="search radius in meters (default: 25000)")
+    parser.add_argument("--city", default=DEFAULT_CITY, help="city label for grids without a city column")
+    parser.add_argument("--dry-run", action="store_true", help="count the new searches without writing them")
+    args = parser.parse_args()
+
+    queries = list(args.query)
+    if args.queries_file:
+        with open(args.queries_file, encoding="utf-8") as f:
+            queries.extend(line.strip() for line in f if line.strip())
+    if not queries:
+        parser.error("give at least one --query or a --queries-file")
+    import_grid(args.grid_file, list(dict.fromkeys(queries)), args.radius, args.city, args.dry_run)
@@ -0,0 +1,104 @@
+import re
+import threading
+from urllib.parse import urljoin, urlparse
+
+from shop_finder.Scripts.email_extractor import email_from_scan, scan_response
+
+# Extra pages fetched per site when the homepage has no email
+PAGE_BUDGET = 3
+# Total HTML read across those pages
+BYTE_BUDGET = 768 * 1024
+
+# Link keywords, best first
+CONTACT_KEYWORDS = ("contact", "wholesale", "about")
+
+LINK_PATTERN = re.compile(r'<a\s[^>]*?href\s*=\s*["\']([^"\']+)["\'][^>]*>(.*?)</a>', re.IGNORECASE | re.DOTALL)
+TAG_PATTERN = re.compile(r"<[^>]+>")
+
+
+class CrawlStats:
+    """Thread-safe counters for how often the contact crawl pays off"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.sites = 0
+        self.sites_with_email = 0
+        self.pages_fetched = 0
+
+    def record(self, pages, found):
+        with self._lock:
+            self.sites += 1
+            self.pages_fetched += pages
+            self.sites_with_email += 1 if found else 0
+
+    def summary(self):
+        with self._lock:
+            return {
+                "sites": self.sites,
+                "sites_with_email": self.sites_with_email,
+                "pages_fetched": self.pages_fetched,
+                "hit_rate": (self.sites_with_email / self.sites * 100) if self.sites else 0.0,
+                "pages_per_site": (self.pages_fetched / self.sites) if self.sites else 0.0
+            }
+
+
+crawl_stats = CrawlStats()
+
+
+def site_host(url):
+    """Host of a URL without a leading www., so shop.com and www.shop.com count as one site"""
+    host = urlparse(url).netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def find_contact_links(html, base_url, limit=PAGE_BUDGET):
+    """Same-site links whose URL or anchor text looks like a contact/about/wholesale page"""
+    base_host = site_host(base_url)
+    ranked = {}
+    for href, text in LINK_PATTERN.findall(html):
+        url = urljoin(base_url, href.strip())
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https") or site_host(url) != base_host:
+            continue
+        url = url.split("#")[0].rstrip("/")
+        if url == base_url.rstrip("/"):
+            continue
+        haystack = f"{parsed.path} {TAG_PATTERN.sub(' ', text)}".lower()
+        for rank, keyword in enumerate(CONTACT_KEYWORDS):
+            if keyword in haystack:
+                ranked[url] = min(rank, ranked.get(url, rank))
+                break
+    return sorted(ranked, key=lambda url: ranked[url])[:limit]
+
+
+def crawl_contact_pages(base_url, homepage_html, fetch, page_budget=PAGE_BUDGET, byte_budget=BYTE_BUDGET):
+    """
+    Look for an email on a site's contact-like pages after the homepage came up empty.
+    fetch(url) must return a streamed requests response. Pages are fetched
+    one after another, each capped at its share of byte_budget, and the
+    crawl stops at the first one that yields an address. Callers hold the
+    site's HostLimiter slot, so this never adds connections to the host.
+    """
+    links = find_contact_links(homepage_html, base_url, page_budget)
+    if not links:
+        return ""
+
+    per_page_bytes = max(byte_budget // len(links), 1)
+    pages = 0
+    email = ""
+    for url in links:
+        pages += 1
+        try:
+            response = fetch(url)
+            if not response.ok:
+                response.close()
+                continue
+            email = email_from_scan(scan_response(response, max_bytes=per_page_bytes))
+        except Exception as e:
+            print(f"❌ Failed to crawl contact page on {base_url}: {e}")
+            continue
+        if email:
+            break
+
+    crawl_stats.record(pages, bool(email))
+    return email
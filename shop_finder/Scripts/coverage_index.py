@@ -0,0 +1,121 @@
+import math
+from collections import defaultdict
+
+from shop_finder.Scripts.search_subdivider import SATURATED_RESULTS, SUBDIVISION_RULES
+
+# Grid cell size in degrees (~5.5 km north-south)
+CELL_DEG = 0.05
+# Points sampled inside a candidate circle to measure its coverage
+SAMPLES = 128
+
+METERS_PER_DEG = 111320.0
+GOLDEN_ANGLE = math.pi * (3 - math.sqrt(5))
+
+# Radii the subdivision rules know about, so a shrunk circle can still subdivide later
+STANDARD_RADII = sorted(set(SUBDIVISION_RULES) | {child for child, _ in SUBDIVISION_RULES.values()})
+
+
+def sample_points(lat, lng, radius_m, samples=SAMPLES):
+    """Evenly spread points inside a circle (sunflower pattern), as (lat, lng, distance from center)"""
+    lng_scale = METERS_PER_DEG * max(math.cos(math.radians(lat)), 0.01)
+    points = []
+    for i in range(samples):
+        distance = radius_m * math.sqrt((i + 0.5) / samples)
+        angle = i * GOLDEN_ANGLE
+        points.append((
+            lat + distance * math.sin(angle) / METERS_PER_DEG,
+            lng + distance * math.cos(angle) / lng_scale,
+            distance
+        ))
+    return points
+
+
+class CoverageIndex:
+    """
+    Uniform lat/lng grid over circles that were searched without saturating.
+
+    Each circle is registered in every cell its bounding box touches, so
+    checking whether a point is covered only looks at the circles in that
+    point's cell.
+    """
+
+    def __init__(self, cell_deg=CELL_DEG):
+        self.cell_deg = cell_deg
+        # query -> cell -> [(lat, lng, radius_m)]
+        self._cells = defaultdict(lambda: defaultdict(list))
+
+    def _cell(self, lat, lng):
+        return (math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg))
+
+    def add(self, query, lat, lng, radius_m):
+        """Register a searched circle as covered for this query"""
+        lat, lng, radius_m = float(lat), float(lng), float(radius_m)
+        lat_reach = radius_m / METERS_PER_DEG
+        lng_reach = radius_m / (METERS_PER_DEG * max(math.cos(math.radians(lat)), 0.01))
+        low_lat, low_lng = self._cell(lat - lat_reach, lng - lng_reach)
+        high_lat, high_lng = self._cell(lat + lat_reach, lng + lng_reach)
+        cells = self._cells[query]
+        for cell_lat in range(low_lat, high_lat + 1):
+            for cell_lng in range(low_lng, high_lng + 1):
+                cells[(cell_lat, cell_lng)].append((lat, lng, radius_m))
+
+    def is_covered(self, query, lat, lng):
+        """Check if a point lies inside any registered circle for this query"""
+        cells = self._cells.get(query)
+        if not cells:
+            return False
+        lng_scale = math.cos(math.radians(lat))
+        for circle_lat, circle_lng, radius_m in cells.get(self._cell(lat, lng), ()):
+            d_lat = (lat - circle_lat) * METERS_PER_DEG
+            d_lng = (lng - circle_lng) * METERS_PER_DEG * lng_scale
+            if d_lat * d_lat + d_lng * d_lng <= radius_m * radius_m:
+                return True
+        return False
+
+    def coverage(self, query, lat, lng, radius_m, samples=SAMPLES):
+        """
+        Fraction of a candidate circle already covered, and the distance from
+        its center to the furthest uncovered sample (0 if fully covered).
+        """
+        if query not in self._cells:
+            return 0.0, float(radius_m)
+        covered = 0
+        uncovered_reach = 0.0
+        for point_lat, point_lng, distance in sample_points(float(lat), float(lng), float(radius_m), samples):
+            if self.is_covered(query, point_lat, point_lng):
+                covered += 1
+            else:
+                uncovered_reach = max(uncovered_reach, distance)
+        return covered / samples, uncovered_reach
+
+    def plan(self, query, lat, lng, radius_m, drop_threshold, shrink=True, samples=SAMPLES):
+        """
+        Decide what to do with a candidate circle: None to drop it, or the
+        radius to search with (shrunk to the smallest standard radius that
+        still reaches every uncovered sample, when shrink is on).
+        """
+        fraction, uncovered_reach = self.coverage(query, lat, lng, radius_m, samples)
+        if fraction >= drop_threshold:
+            return None
+        if shrink and fraction > 0:
+            # Pad by one sample spacing so gaps between samples are not missed
+            needed = uncovered_reach + radius_m / math.sqrt(samples)
+            for standard in STANDARD_RADII:
+                if needed <= standard < radius_m:
+                    return standard
+        return radius_m
+
+    @classmethod
+    def from_rows(cls, search_log_rows, optimal_radii_rows=()):
+        """
+        Build from optimal radii rows (searches that did not saturate) and
+        search log rows that recorded fewer than SATURATED_RESULTS results.
+        """
+        index = cls()
+        for row in optimal_radii_rows:
+            index.add(row["query"], row["lat"], row["lng"], row["radius"])
+        for row in search_log_rows:
+            # Rows without a count may have saturated, so they prove nothing
+            if row.get("results") and int(row["results"]) < SATURATED_RESULTS:
+                index.add(row["query"], row["lat"], row["lng"], row["radius_m"])
+        return index
@@ -0,0 +1,106 @@
+import csv
+import hashlib
+import json
+import os
+
+
+def store_key(name, address, city):
+    """Normalized (name, address, city) key used to spot the same store twice"""
+    return (name.strip().lower(), address.strip().lower(), city.strip().lower())
+
+
+def row_key(row):
+    """store_key for a CSV row dict"""
+    return store_key(row.get("name", ""), row.get("address", ""), row.get("city", ""))
+
+
+def _digest(key):
+    return hashlib.blake2b("\x1f".join(key).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class CsvKeyIndex:
+    """
+    Hashed set of row keys (store keys unless another key function is given)
+    for a CSV file, persisted next to it as a sidecar.
+
+    The sidecar holds one digest per line and a small .meta file with the
+    mtime and size of the CSV it was built from. When the CSV changes behind
+    our back (hand edits, listCleaner rewrites) the index rebuilds itself;
+    rows we append ourselves are added with add() so no rebuild is needed.
+    """
+
+    def __init__(self, csv_path, sidecar_path=None, key=row_key):
+        self.csv_path = csv_path
+        self.key = key
+        self.sidecar_path = sidecar_path or f"{csv_path}.keys"
+        self.meta_path = f"{self.sidecar_path}.meta"
+        self._keys = None
+        self._stamp = None
+
+    def _csv_stamp(self):
+        if not os.path.exists(self.csv_path):
+            return None
+        stat = os.stat(self.csv_path)
+        return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+    def _write_meta(self):
+        with open(self.meta_path, "w", encoding="utf-8") as f:
+            json.dump(self._stamp, f)
+
+    def _load_sidecar(self, stamp):
+        """Load the sidecar if it was built from the CSV as it is right now"""
+        try:
+            with open(self.meta_path, encoding="utf-8") as f:
+                if json.load(f) != stamp:
+                    return False
+            with open(self.sidecar_path, encoding="utf-8") as f:
+                self._keys = {line.strip() for line in f if line.strip()}
+        except (OSError, ValueError):
+            return False
+        self._stamp = stamp
+        return True
+
+    def rebuild(self):
+        """Rebuild the index and its sidecar from the CSV"""
+        self._keys = set()
+        self._stamp = self._csv_stamp()
+        if self._stamp is None:
+            return
+        with open(self.csv_path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                self._keys.add(_digest(self.key(row)))
+        with open(self.sidecar_path, "w", encoding="utf-8") as f:
+            f.writelines(f"{key}\n" for key in self._keys)
+        self._write_meta()
+
+    def refresh(self):
+        """Make sure the in-memory keys match the CSV on disk"""
+        stamp = self._csv_stamp()
+        if self._keys is not None and stamp == self._stamp:
+            return
+        if stamp is None:
+            self._keys, self._stamp = set(), None
+        elif not self._load_sidecar(stamp):
+            self.rebuild()
+
+    def contains_row(self, row):
+        """O(1) check whether a row with the same key is already in the CSV"""
+        self.refresh()
+        return _digest(self.key(row)) in self._keys
+
+    def add(self, rows):
+        """
+        Record rows that were just appended to the CSV.
+        Call refresh() before appending so the sidecar is only extended, not rebuilt.
+        """
+        if self._keys is None:
+            self.rebuild()  # the CSV already holds the new rows
+            return
+        new_keys = {_digest(self.key(row)) for row in rows} - self._keys
+        if new_keys:
+            with open(self.sidecar_path, "a", encoding="utf-8") as f:
+                f.writelines(f"{key}\n" for key in new_keys)
+            self._keys.update(new_keys)
+        self._stamp = self._csv_stamp()
+        self._write_meta()
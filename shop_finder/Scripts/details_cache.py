@@ -0,0 +1,85 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_TTL_DAYS = 90
+DEFAULT_MEMORY_SIZE = 5000
+
+
+class DetailsCache:
+    """
+    Place Details results (the website field) keyed by place_id.
+
+    Entries live in a SQLite file so they survive between runs, with a small
+    LRU dict in front of it. Anything older than the TTL counts as a miss
+    and is fetched (and billed) again.
+    """
+
+    def __init__(self, db_path, ttl_days=DEFAULT_TTL_DAYS, memory_size=DEFAULT_MEMORY_SIZE):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_days * 24 * 60 * 60
+        self.memory_size = memory_size
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+
+    def _connect(self):
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS place_details (
+                    place_id TEXT PRIMARY KEY,
+                    website TEXT NOT NULL,
+                    fetched_at REAL NOT NULL
+                )
+            """)
+        return self._db
+
+    def _remember(self, place_id, entry):
+        self._memory[place_id] = entry
+        self._memory.move_to_end(place_id)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get(self, place_id):
+        """Cached website for a place ("" if it has none), or None on a miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(place_id)
+            if entry is None:
+                entry = self._connect().execute(
+                    "SELECT website, fetched_at FROM place_details WHERE place_id = ?", (place_id,)
+                ).fetchone()
+            if entry is None or now - entry[1] > self.ttl_seconds:
+                self._memory.pop(place_id, None)
+                self.misses += 1
+                return None
+            self._remember(place_id, entry)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, place_id, website):
+        """Store a freshly fetched Details result"""
+        entry = (website or "", time.time())
+        with self._lock:
+            db = self._connect()
+            db.execute(
+                "INSERT OR REPLACE INTO place_details (place_id, website, fetched_at) VALUES (?, ?, ?)",
+                (place_id, entry[0], entry[1])
+            )
+            db.commit()
+            self._remember(place_id, entry)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups * 100) if lookups else 0.0
+        }
@@ -0,0 +1,144 @@
+import codecs
+import re
+
+from bs4 import BeautifulSoup
+
+# Stop reading a page after this many bytes
+MAX_BYTES = 512 * 1024
+CHUNK_SIZE = 16 * 1024
+# Characters carried between chunks so an address split across two chunks is still found
+OVERLAP = 256
+
+EMAIL_PATTERN = re.compile(r'[\w\.-]+@[\w\.-]+\.\w+')
+MAILTO_PATTERN = re.compile(r'mailto:(?:\s|%20)*([\w\.\-+]+@[\w\.-]+\.\w+)', re.IGNORECASE)
+# EMAIL_PATTERN split in two so we only run regexes around "@" instead of at every word
+LOCAL_PART = re.compile(r'[\w\.-]{1,64}$')
+DOMAIN_PART = re.compile(r'@[\w\.-]+\.\w+')
+
+# "logo@2x.png" and friends show up in srcset attributes, not contact details
+NOT_EMAIL_SUFFIXES = (".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".css", ".js")
+PLACEHOLDER_DOMAINS = ("example.com", "domain.com", "email.com", "sentry.io", "wixpress.com")
+
+
+def is_plausible_email(email):
+    """Filter out asset names and placeholder addresses that match the email regex"""
+    email = email.lower()
+    if email.endswith(NOT_EMAIL_SUFFIXES):
+        return False
+    return not email.split("@", 1)[1].endswith(PLACEHOLDER_DOMAINS)
+
+
+def find_emails(text):
+    """Yield (end, email) for every EMAIL_PATTERN match, anchored on each "@" in the text"""
+    consumed = 0  # like finditer, matches never overlap
+    at = text.find("@")
+    while at != -1:
+        domain = DOMAIN_PART.match(text, at)
+        if domain:
+            local = LOCAL_PART.search(text, max(consumed, at - 64), at)
+            if local:
+                yield domain.end(), text[local.start():domain.end()]
+                consumed = domain.end()
+                at = text.find("@", consumed)
+                continue
+        at = text.find("@", at + 1)
+
+
+def find_mailtos(text):
+    """Yield (end, email) for every mailto: link in the text"""
+    if "mailto" not in text.lower():
+        return
+    for match in MAILTO_PATTERN.finditer(text):
+        yield match.end(), match.group(1)
+
+
+class EmailScan:
+    """Result of scanning a page: candidate emails in document order plus the bytes read"""
+
+    def __init__(self):
+        self.mailto = []
+        self.text = []
+        self.bytes_read = 0
+        self.stopped_early = False
+        self.raw = bytearray()
+
+    def best(self):
+        """mailto: links first, then the first plausible address in the page"""
+        candidates = self.mailto + self.text
+        return candidates[0] if candidates else ""
+
+    @staticmethod
+    def add(found, email):
+        if email not in found and is_plausible_email(email):
+            found.append(email)
+
+
+def scan_html_chunks(chunks, encoding="utf-8", max_bytes=MAX_BYTES, stop_early=True, keep_raw=True):
+    """
+    Scan an iterable of byte chunks for emails without building a DOM.
+    Stops at max_bytes or as soon as a plausible address is found.
+    """
+    scan = EmailScan()
+    decoder = codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+    tail = ""
+    for chunk in chunks:
+        if not chunk:
+            continue
+        chunk = chunk[:max_bytes - scan.bytes_read]
+        scan.bytes_read += len(chunk)
+        if keep_raw:
+            scan.raw.extend(chunk)
+        final = scan.bytes_read >= max_bytes
+        buffer = tail + decoder.decode(chunk, final=final)
+        # Matches touching the end of the buffer may be cut off; they are picked up next round
+        limit = len(buffer) if final else len(buffer) - 1
+        for end, email in find_mailtos(buffer):
+            if end < limit or final:
+                scan.add(scan.mailto, email)
+        for end, email in find_emails(buffer):
+            if end < limit or final:
+                scan.add(scan.text, email)
+        tail = buffer[-OVERLAP:]
+        if stop_early and (scan.mailto or scan.text):
+            scan.stopped_early = not final
+            return scan
+        if final:
+            return scan
+
+    buffer = tail + decoder.decode(b"", final=True)
+    for _, email in find_mailtos(buffer):
+        scan.add(scan.mailto, email)
+    for _, email in find_emails(buffer):
+        scan.add(scan.text, email)
+    return scan
+
+
+def extract_email_full_parse(html):
+    """The original approach: full BeautifulSoup parse, then one regex over the text"""
+    soup = BeautifulSoup(html, 'html.parser')
+    for email in EMAIL_PATTERN.findall(soup.get_text()):
+        if is_plausible_email(email):
+            return email
+    return ""
+
+
+def scan_response(response, max_bytes=MAX_BYTES, chunk_size=CHUNK_SIZE):
+    """Run a streamed requests response through scan_html_chunks, then release it"""
+    try:
+        return scan_html_chunks(
+            response.iter_content(chunk_size=chunk_size),
+            encoding=response.encoding or "utf-8",
+            max_bytes=max_bytes
+        )
+    finally:
+        response.close()
+
+
+def email_from_scan(scan):
+    """
+    Best streamed candidate. Only falls back to a full parse of the bytes
+    read when the raw scan found nothing (e.g. entity-encoded addresses).
+    """
+    if scan.best() or not scan.raw:
+        return scan.best()
+    return extract_email_full_parse(bytes(scan.raw))
@@ -0,0 +1,52 @@
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Connection pool tuning, overridable from the environment
+POOL_CONNECTIONS = int(os.getenv("SHOP_FINDER_POOL_CONNECTIONS", "20"))  # Hosts kept in the pool
+POOL_MAXSIZE = int(os.getenv("SHOP_FINDER_POOL_MAXSIZE", "16"))  # Keep-alive connections per host
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0",
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _build_session(pool_connections, pool_maxsize):
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def configure(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE):
+    """Replace the shared session with one using the given pool sizes"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = _build_session(pool_connections, pool_maxsize)
+    return _session
+
+
+def get_session():
+    """Shared keep-alive session used for Places, Details and website scraping"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session(POOL_CONNECTIONS, POOL_MAXSIZE)
+    return _session
+
+
+def http_get(url, **kwargs):
+    """requests.get through the shared connection pool"""
+    return get_session().get(url, **kwargs)
@@ -1,7 +1,12 @@
+import argparse
 import csv
 import re
 import os
+import time
 from shop_finder.config import FILES
+from shop_finder.Scripts.retailer_filter import load_exclusion_matcher
+from shop_finder.Scripts.csv_key_index import row_key
+from shop_finder.Scripts.storage import STORE_FIELDS, get_table, read_header
 
 
 # Known TLDs for email boundary
@@ -12,6 +17,9 @@ SUSPICIOUS_PREFIXES = [
     'service', 'contact', 'info', 'help', 'usemail', 'support', 'team', 'admin'
 ]
 
+EMAIL_PATTERN = re.compile(rf'\b[\w\.-]+@[\w\.-]+\.(?:{TLDs})\b', re.IGNORECASE)
+SUSPICIOUS_PATTERN = re.compile("|".join(map(re.escape, SUSPICIOUS_PREFIXES)))
+
 # File paths
 MASTER_FILE = FILES["master_list"]
 WITH_EMAILS_FILE = FILES["with_emails"]
@@ -19,30 +27,17 @@ WITHOUT_EMAILS_FILE = FILES["without_emails"]
 CLEAN_WITH_EMAILS_FILE = "fenclaw_search/clean_with_emails.csv"
 CLEAN_WITHOUT_EMAILS_FILE = "fenclaw_search/clean_without_emails.csv"
 
-def load_excluded_retailers():
-    """Load the list of retailers to exclude"""
-    excluded_retailers = set()
-    try:
-        with open(FILES["excluded_retailers"], newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                excluded_retailers.add(row["retailer_name"].strip().lower())
-    except FileNotFoundError:
-        print("⚠️ Warning: excluded_retailers.csv not found. No retailers will be excluded.")
-    return excluded_retailers
-
-def is_excluded_retailer(name, excluded_retailers):
-    """Check if a store name matches any excluded retailer"""
-    name_lower = name.strip().lower()
-    return any(excluded.lower() in name_lower for excluded in excluded_retailers)
+# Column order of the master list and split files
+FIELDNAMES = STORE_FIELDS
+# Fields left out of the clean files
+CLEAN_FIELDS_TO_REMOVE = ["coordinates", "location_id"]
 
 def clean_smart_emails(text):
-    emails = re.findall(rf'\b[\w\.-]+@[\w\.-]+\.(?:{TLDs})\b', text, re.IGNORECASE)
-    emails = list(set(emails))
+    emails = dict.fromkeys(EMAIL_PATTERN.findall(text))  # unique, in order of appearance
     flagged = []
     for email in emails:
         local_part = email.split("@")[0].lower()
-        flagged.append((email, any(prefix in local_part for prefix in SUSPICIOUS_PREFIXES)))
+        flagged.append((email, SUSPICIOUS_PATTERN.search(local_part) is not None))
     return flagged
 
 def load_csv(file_path):
@@ -58,24 +53,14 @@ def save_csv(file_path, rows, fieldnames):
         writer.writeheader()
         writer.writerows(rows)
 
-def is_duplicate(entry, existing_entries):
-    for other in existing_entries:
-        if (
-            entry.get("name", "").strip().lower() == other.get("name", "").strip().lower() and
-            entry.get("address", "").strip().lower() == other.get("address", "").strip().lower() and
-            entry.get("city", "").strip().lower() == other.get("city", "").strip().lower()
-        ):
-            return True
-    return False
-
 def create_clean_retailer_files(with_emails, without_emails):
     """Create clean versions of the retailer files with excluded retailers removed"""
     # Load excluded retailers
-    excluded_retailers = load_excluded_retailers()
+    excluded_retailers = load_exclusion_matcher()
     print(f"\n📋 Loaded {len(excluded_retailers)} excluded retailers")
     
     # Fields to remove from output
-    fields_to_remove = ["coordinates", "location_id"]
+    fields_to_remove = CLEAN_FIELDS_TO_REMOVE
     
     # Process each file
     files_to_process = [
@@ -95,13 +80,14 @@ def create_clean_retailer_files(with_emails, without_emails):
             fieldnames = [field for field in entries[0].keys() if field not in fields_to_remove]
 
             # Process each entry
-            for row in entries:
-                if is_excluded_retailer(row["name"], excluded_retailers):
+            excluded_flags = excluded_retailers.filter_names(row["name"] for row in entries)
+            for row, excluded in zip(entries, excluded_flags):
+                if excluded:
                     removed_count += 1
                     continue
 
                 # Create new row without unwanted fields
-                clean_row = {field: row[field] for field in fieldnames}
+                clean_row = {field: row.get(field, "") for field in fieldnames}
                 kept_entries.append(clean_row)
 
             # Sort entries by city
@@ -129,72 +115,141 @@ def create_clean_retailer_files(with_emails, without_emails):
         else:
             print(f"⚠️ No data rows in {output_file}. Skipping processing.")
 
+def append_clean_retailer_files(new_with_emails, new_without_emails):
+    """
+    Append new entries to the clean files, sorted by city among themselves.
+    A full process_master_list run re-sorts the whole files and re-applies
+    the exclusion list to older entries.
+    """
+    excluded_retailers = load_exclusion_matcher()
+
+    for entries, output_file in ((new_with_emails, CLEAN_WITH_EMAILS_FILE),
+                                 (new_without_emails, CLEAN_WITHOUT_EMAILS_FILE)):
+        fieldnames = read_header(output_file)
+        if fieldnames is None:
+            fieldnames = [field for field in FIELDNAMES if field not in CLEAN_FIELDS_TO_REMOVE]
+            save_csv(output_file, [], fieldnames)
+
+        excluded_flags = excluded_retailers.filter_names(row["name"] for row in entries)
+        kept_entries = [
+            {field: row.get(field, "") for field in fieldnames}
+            for row, excluded in zip(entries, excluded_flags) if not excluded
+        ]
+        kept_entries.sort(key=lambda x: x["city"].lower())
+        append_csv(output_file, kept_entries, fieldnames)
+
+        print(f"📊 {output_file}: added {len(kept_entries)}, removed {len(entries) - len(kept_entries)} excluded retailers")
+
+
+def phase_timer(timings):
+    """Return end_phase(name), which records seconds since the previous phase in timings (if given)"""
+    phase_start = [time.perf_counter()]
+
+    def end_phase(name):
+        now = time.perf_counter()
+        if timings is not None:
+            timings[name] = now - phase_start[0]
+        phase_start[0] = now
+
+    return end_phase
+
+def sort_row(row, master_fields):
+    """Mark a master list row sorted and clean its email; returns True if the email was flagged"""
+    # Ensure all fields have at least empty string values
+    for field in master_fields:
+        if field not in row or row[field] is None:
+            row[field] = ""
+
+    row["sorted"] = "true"
+    email = row.get("email", "").strip()
+    if not email:
+        return False
+
+    result = clean_smart_emails(email)
+    if result:
+        email_cleaned, flagged = result[0]
+        row["email"] = email_cleaned
+
+        if flagged:
+            row["flagged"] = "true"
+            return True
+    row.pop("flagged", "")  # Remove the key if it exists
+    return False
+
+def sort_rows(rows, master_fields):
+    """sort_row over a batch; returns the number flagged"""
+    return sum(sort_row(row, master_fields) for row in rows)
+
+def append_csv(file_path, rows, fieldnames):
+    with open(file_path, "a", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
+        writer.writerows(rows)
 
-def process_master_list():
-    master_data, master_fields = load_csv(MASTER_FILE)
-    with_emails, _ = load_csv(WITH_EMAILS_FILE)
-    without_emails, _ = load_csv(WITHOUT_EMAILS_FILE)
+def process_master_list(timings=None, incremental=False):
+    """
+    Dedupe the master list, split it into the with/without email tables and
+    rebuild the clean files. If a timings dict is passed it is filled with
+    seconds spent per phase (load, dedupe, split, save, clean).
+
+    With incremental=True only rows appended since the last run are
+    processed, as long as the master list watermark is still valid and the
+    tables have the standard columns; otherwise this falls back to a full run.
+    """
+    end_phase = phase_timer(timings)
+    master = get_table("master_list")
+    with_table = get_table("with_emails")
+    without_table = get_table("without_emails")
+    if incremental:
+        mark = master.read_watermark()
+        columns_match = all(table.fieldnames() == FIELDNAMES for table in (master, with_table, without_table))
+        if mark is not None and columns_match:
+            process_new_rows(mark, master, with_table, without_table, end_phase)
+            return
+        print("ℹ️ No usable watermark for the master list - running a full pass")
+
+    master_data = list(master.rows())
+    master_fields = master.fieldnames()
+    with_emails = list(with_table.rows())
+    without_emails = list(without_table.rows())
+    end_phase("load")
     master_data = dedupe(master_data)
+    end_phase("dedupe")
 
     print(f"📥 Loaded {len(master_data)} entries from master_list.csv")
 
     updated_master = []
     updated_with_emails = with_emails[:]
     updated_without_emails = without_emails[:]
+    # Store keys already in each output file, so duplicate checks are set lookups
+    with_email_keys = {row_key(row) for row in with_emails}
+    without_email_keys = {row_key(row) for row in without_emails}
 
     moved_to_with = 0
     moved_to_without = 0
-    newly_flagged = 0
+    newly_flagged = sort_rows(master_data, master_fields)
 
     for row in master_data:
-        # Ensure all fields have at least empty string values
-        for field in master_fields:
-            if field not in row or row[field] is None:
-                row[field] = ""
-
-        row["sorted"] = "true"
-        email = row.get("email", "").strip()
-
-        if email:
-            result = clean_smart_emails(email)
-            if result:
-                email_cleaned, flagged = result[0]
-                row["email"] = email_cleaned
-
-                if flagged:
-                    row["flagged"] = "true"
-                    newly_flagged += 1
-                else:
-                    row.pop("flagged", "")  # Remove the key if it exists
-            else:
-                row.pop("flagged", "")
-
-            if not is_duplicate(row, updated_with_emails):
+        # Silently skip stores already in the split file
+        key = row_key(row)
+        if row.get("email", "").strip():
+            if key not in with_email_keys:
+                with_email_keys.add(key)
                 updated_with_emails.append(row)
                 moved_to_with += 1
-            else:
-                # Silently skip duplicates
-                pass
-        else:
-            if not is_duplicate(row, updated_without_emails):
-                updated_without_emails.append(row)
-                moved_to_without += 1
-            else:
-                # Silently skip duplicates
-                pass
+        elif key not in without_email_keys:
+            without_email_keys.add(key)
+            updated_without_emails.append(row)
+            moved_to_without += 1
 
         updated_master.append(row)
+    end_phase("split")
 
-    # Ensure all fieldnames are preserved (original + added ones)
-    # Manually define desired column order
-    fieldnames = [
-        "sorted", "query", "city", "location_id", "coordinates", "name", "address", "website", "email", "flagged"
-    ]
-
-    # Save everything
-    save_csv(MASTER_FILE, updated_master, fieldnames)
-    save_csv(WITH_EMAILS_FILE, updated_with_emails, fieldnames)
-    save_csv(WITHOUT_EMAILS_FILE, updated_without_emails, fieldnames)
+    # Save everything (dedupe dropped rows, not keys, so the master key index stays valid)
+    master.rewrite(updated_master, FIELDNAMES, same_keys=True)
+    master.write_watermark()
+    with_table.rewrite(updated_with_emails, FIELDNAMES)
+    without_table.rewrite(updated_without_emails, FIELDNAMES)
+    end_phase("save")
 
     # ✅ Debug summary
     print(f"📤 Moved {moved_to_with} entries to stores_with_emails.csv")
@@ -205,20 +260,70 @@ def process_master_list():
     # Create clean versions of the files
     print("\n🧹 Creating clean versions of files (excluding major retailers)...")
     create_clean_retailer_files(updated_with_emails, updated_without_emails)
+    end_phase("clean")
+
+def process_new_rows(mark, master, with_table, without_table, end_phase):
+    """
+    Incremental pass: sort only the rows after the watermark, rewrite just
+    that tail of the master list and append to the split and clean files.
+    Stores are checked against the split tables' keys, which cover every
+    store sorted so far.
+    """
+    new_rows = master.rows_since(mark)
+    master_fields = master.fieldnames()
+    end_phase("load")
+
+    seen = set()
+    unique_rows = []
+    for row in new_rows:
+        key = row_key(row)
+        if key in seen or with_table.has_key(row) or without_table.has_key(row):
+            continue
+        seen.add(key)
+        unique_rows.append(row)
+    end_phase("dedupe")
+
+    print(f"📥 Loaded {len(new_rows)} new entries from the master list ({len(unique_rows)} new stores)")
+
+    new_with_emails = []
+    new_without_emails = []
+    newly_flagged = sort_rows(unique_rows, master_fields)
+    for row in unique_rows:
+        if row.get("email", "").strip():
+            new_with_emails.append(row)
+        else:
+            new_without_emails.append(row)
+    end_phase("split")
+
+    # Replace the unsorted tail with the sorted rows; only duplicates were dropped
+    master.replace_since(mark, unique_rows, FIELDNAMES, same_keys=True)
+    master.write_watermark()
+    with_table.append(new_with_emails)
+    without_table.append(new_without_emails)
+    end_phase("save")
+
+    print(f"📤 Moved {len(new_with_emails)} entries to stores_with_emails.csv")
+    print(f"📤 Moved {len(new_without_emails)} entries to stores_without_email.csv")
+    print(f"🚩 Flagged {newly_flagged} suspicious email(s)")
+    print("✅ Processing complete. All sorted entries marked.")
+
+    print("\n🧹 Appending new entries to the clean files (excluding major retailers)...")
+    append_clean_retailer_files(new_with_emails, new_without_emails)
+    end_phase("clean")
 
 def dedupe(rows):
     seen = set()
     unique = []
     for row in rows:
-        key = (
-            row.get("name", "").strip().lower(),
-            row.get("address", "").strip().lower(),
-            row.get("city", "").strip().lower()
-        )
+        key = row_key(row)
         if key not in seen:
             seen.add(key)
             unique.append(row)
     return unique
 
 if __name__ == "__main__":
-    process_master_list()
+    parser = argparse.ArgumentParser(description="Sort master_list.csv into the email split and clean files")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only process rows added since the last run")
+    args = parser.parse_args()
+    process_master_list(incremental=args.incremental)
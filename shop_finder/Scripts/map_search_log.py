@@ -1,43 +1,232 @@
 # map_search_log.py
+import argparse
+import json
+import math
 import folium
-import csv
-from shop_finder.config import FILES
+from branca.element import MacroElement
+from jinja2 import Template
+from shop_finder.Scripts.storage import get_table, read_csv_rows
 from collections import defaultdict
 
-def generate_search_map(log_file=FILES["search_log"], output_file="search_map.html"):
-    # Set up base map
-    m = folium.Map(location=[39.8283, -98.5795], zoom_start=5)
+MAP_CENTER = [39.8283, -98.5795]
+MAP_ZOOM = 5
+
+# In "auto" mode logs with at least this many searches are aggregated instead of drawn circle by circle
+AGGREGATE_MIN_ROWS = 2000
+# Zoom at which the aggregated map switches from density cells to the individual circles
+DETAIL_MIN_ZOOM = 9
+# (from zoom, cell size in degrees) for the density grid shown below DETAIL_MIN_ZOOM
+DENSITY_LEVELS = [(0, 2.0), (6, 0.5)]
+# Decimal places kept for coordinates in the embedded GeoJSON (~1 m)
+COORD_DIGITS = 5
+
+
+class ZoomSwitch(MacroElement):
+    """
+    Fills each query's FeatureGroup from its GeoJSON and swaps the contents
+    on zoom: the density grid for the current zoom, or the individual
+    circles (built on first use) from DETAIL_MIN_ZOOM up.
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        (function() {
+            var map = {{ this._parent.get_name() }};
+            var detailZoom = {{ this.detail_zoom }};
+            var layers = [
+                {%- for layer in this.layers %}
+                {group: {{ layer.group.get_name() }}, query: {{ layer.query }},
+                 circles: {{ layer.circles }}, levels: {{ layer.levels }}},
+                {%- endfor %}
+            ];
+
+            function circleLayer(layer) {
+                return L.geoJSON(layer.circles, {
+                    pointToLayer: function(feature, latlng) {
+                        return L.circle(latlng, {
+                            radius: feature.properties.radius_m, color: "blue", weight: 1, fillOpacity: 0.4
+                        });
+                    },
+                    onEachFeature: function(feature, circles) {
+                        circles.bindPopup(function() {
+                            return layer.query + "<br>" + feature.properties.city + "<br>" +
+                                feature.properties.radius_m + " meters";
+                        }, {maxWidth: 300});
+                    }
+                });
+            }
+
+            function densityLayer(level) {
+                var maxCount = Math.max.apply(null, level.cells.features.map(function(f) {
+                    return f.properties.count;
+                }).concat([1]));
+                return L.geoJSON(level.cells, {
+                    style: function(feature) {
+                        var share = Math.log(1 + feature.properties.count) / Math.log(1 + maxCount);
+                        return {color: "blue", weight: 0, fillOpacity: 0.15 + 0.6 * share};
+                    },
+                    onEachFeature: function(feature, cell) {
+                        cell.bindTooltip(feature.properties.count + " searches");
+                    }
+                });
+            }
+
+            function update() {
+                var zoom = map.getZoom();
+                layers.forEach(function(layer) {
+                    var next;
+                    if (zoom >= detailZoom) {
+                        layer.circleLayer = layer.circleLayer || circleLayer(layer);
+                        next = layer.circleLayer;
+                    } else {
+                        var level = layer.levels.filter(function(l) { return l.min_zoom <= zoom; }).pop();
+                        level.layer = level.layer || densityLayer(level);
+                        next = level.layer;
+                    }
+                    if (layer.shown !== next) {
+                        layer.group.clearLayers();
+                        layer.group.addLayer(next);
+                        layer.shown = next;
+                    }
+                });
+            }
+
+            map.on("zoomend", update);
+            update();
+        })();
+        {% endmacro %}
+    """)
+
+    def __init__(self, detail_zoom=DETAIL_MIN_ZOOM):
+        super().__init__()
+        self._name = "ZoomSwitch"
+        self.detail_zoom = detail_zoom
+        self.layers = []
+
+    def add_layer(self, group, query, circles, levels):
+        self.layers.append({"group": group, "query": to_js(query), "circles": to_js(circles), "levels": to_js(levels)})
+
+
+def to_js(value):
+    """Compact JSON that is safe to embed in a <script> block"""
+    return json.dumps(value, separators=(",", ":")).replace("</", "<\\/")
+
+
+def circle_collection(rows):
+    """
+    GeoJSON FeatureCollection of the searched circle centers, one MultiPoint
+    feature per city and radius so the shared properties are stored once
+    """
+    centers = defaultdict(list)
+    for row in rows:
+        centers[(row["city"], int(row["radius_m"]))].append(
+            [round(float(row["lng"]), COORD_DIGITS), round(float(row["lat"]), COORD_DIGITS)]
+        )
+    return {
+        "type": "FeatureCollection",
+        "features": [{
+            "type": "Feature",
+            "geometry": {"type": "MultiPoint", "coordinates": coordinates},
+            "properties": {"city": city, "radius_m": radius_m}
+        } for (city, radius_m), coordinates in centers.items()]
+    }
+
+
+def density_collection(rows, cell_deg):
+    """GeoJSON square cells of cell_deg degrees with the number of searches centered in each"""
+    counts = defaultdict(int)
+    for row in rows:
+        counts[(math.floor(float(row["lat"]) / cell_deg), math.floor(float(row["lng"]) / cell_deg))] += 1
+
+    features = []
+    for (cell_lat, cell_lng), count in counts.items():
+        south, west = round(cell_lat * cell_deg, COORD_DIGITS), round(cell_lng * cell_deg, COORD_DIGITS)
+        north, east = round(south + cell_deg, COORD_DIGITS), round(west + cell_deg, COORD_DIGITS)
+        features.append({
+            "type": "Feature",
+            "geometry": {
+                "type": "Polygon",
+                "coordinates": [[[west, south], [east, south], [east, north], [west, north], [west, south]]]
+            },
+            "properties": {"count": count}
+        })
+    return {"type": "FeatureCollection", "features": features}
+
+
+def add_circle_layers(m, rows):
+    """One folium.Circle with its own popup per search, grouped by query"""
     query_layers = defaultdict(lambda: folium.FeatureGroup(name="unknown", show=True))
 
-    with open(log_file, newline='', encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            query = row["query"]
-            city = row["city"]
-            lat = float(row["lat"])
-            lng = float(row["lng"])
-            radius_m = int(row["radius_m"])
-
-            popup_text = f"{query}<br>{city}<br>{radius_m} meters"
-            circle = folium.Circle(
-                location=[lat, lng],
-                radius=radius_m,
-                color="blue",
-                fill=True,
-                fill_opacity=0.4,
-                popup=folium.Popup(popup_text, max_width=300)
-            )
-
-            layer_name = f"{query}"
-            query_layers[layer_name].add_child(circle)
+    for row in rows:
+        query = row["query"]
+        city = row["city"]
+        lat = float(row["lat"])
+        lng = float(row["lng"])
+        radius_m = int(row["radius_m"])
+
+        popup_text = f"{query}<br>{city}<br>{radius_m} meters"
+        circle = folium.Circle(
+            location=[lat, lng],
+            radius=radius_m,
+            color="blue",
+            fill=True,
+            fill_opacity=0.4,
+            popup=folium.Popup(popup_text, max_width=300)
+        )
+
+        layer_name = f"{query}"
+        query_layers[layer_name].add_child(circle)
 
     for layer in query_layers.values():
         m.add_child(layer)
 
+
+def add_aggregate_layers(m, rows):
+    """One FeatureGroup per query holding a GeoJSON layer that ZoomSwitch swaps by zoom"""
+    rows_by_query = defaultdict(list)
+    for row in rows:
+        rows_by_query[row["query"]].append(row)
+
+    switch = ZoomSwitch()
+    for query, query_rows in rows_by_query.items():
+        group = folium.FeatureGroup(name=query, show=True)
+        m.add_child(group)
+        levels = [
+            {"min_zoom": min_zoom, "cells": density_collection(query_rows, cell_deg)}
+            for min_zoom, cell_deg in DENSITY_LEVELS
+        ]
+        switch.add_layer(group, query, circle_collection(query_rows), levels)
+    m.add_child(switch)
+
+
+def generate_search_map(log_file=None, output_file="search_map.html", mode="auto"):
+    """
+    Map every logged search; reads the configured search_log table unless a CSV file is given.
+
+    mode "circles" draws one circle per search, "aggregate" embeds each query
+    as GeoJSON and shows a density grid until DETAIL_MIN_ZOOM, and "auto"
+    aggregates once the log reaches AGGREGATE_MIN_ROWS searches.
+    """
+    rows = list(read_csv_rows(log_file) if log_file else get_table("search_log").rows())
+    if mode == "auto":
+        mode = "aggregate" if len(rows) >= AGGREGATE_MIN_ROWS else "circles"
+
+    # Set up base map; canvas keeps thousands of vector shapes responsive
+    m = folium.Map(location=MAP_CENTER, zoom_start=MAP_ZOOM, prefer_canvas=(mode == "aggregate"))
+    if mode == "aggregate":
+        add_aggregate_layers(m, rows)
+    else:
+        add_circle_layers(m, rows)
+
     folium.LayerControl().add_to(m)
     m.save(output_file)
     print(f"✅ Map saved to {output_file}")
 
 # Optional: run as script
 if __name__ == "__main__":
-    generate_search_map()
+    parser = argparse.ArgumentParser(description="Map the logged search circles")
+    parser.add_argument("--mode", choices=("auto", "circles", "aggregate"), default="auto")
+    parser.add_argument("--log-file", help="search_log CSV to map instead of the configured table")
+    parser.add_argument("--output", default="search_map.html")
+    args = parser.parse_args()
+    generate_search_map(args.log_file, args.output, args.mode)
@@ -0,0 +1,161 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+SKUS = ("text_search", "details")
+
+# Flush pending usage to disk after this many seconds or this many calls
+FLUSH_INTERVAL = 30
+FLUSH_EVERY = 50
+
+# How long to wait for the ledger lock. A flush holds it for milliseconds, so a
+# lock file older than STALE_LOCK_SECONDS (well inside the wait) is left over
+# from a run killed mid-flush and is removed.
+LOCK_TIMEOUT = 10
+STALE_LOCK_SECONDS = 3
+
+
+def current_month():
+    return time.strftime("%Y-%m")
+
+
+@contextmanager
+def file_lock(path, timeout=LOCK_TIMEOUT):
+    """Cross-process lock using an exclusively created .lock file"""
+    lock_path = f"{path}.lock"
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_path) > STALE_LOCK_SECONDS:
+                    os.remove(lock_path)
+                    continue
+            except OSError:
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Could not lock {path}")
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        os.remove(lock_path)
+
+
+class QuotaLedger:
+    """
+    API usage per month and per SKU, counted in memory.
+
+    Calls are added to a pending tally and merged into the ledger file
+    under a file lock every FLUSH_INTERVAL seconds / FLUSH_EVERY calls,
+    re-reading the file first so concurrent runs never overwrite each
+    other's counts. The current month's total is also mirrored to the old
+    usage_counter.txt.
+
+    Work that is about to spend calls can reserve() them first; held calls
+    count against the limit until they are released, so parallel workers
+    cannot all pass the quota check and then overshoot it together.
+    """
+
+    def __init__(self, ledger_path, counter_path=None, flush_interval=FLUSH_INTERVAL, flush_every=FLUSH_EVERY):
+        self.ledger_path = ledger_path
+        self.counter_path = counter_path
+        self.flush_interval = flush_interval
+        self.flush_every = flush_every
+        self._lock = threading.RLock()
+        self._pending = defaultdict(int)
+        self._pending_calls = 0
+        self._held = 0
+        self._last_flush = time.monotonic()
+        self._totals = self._read()
+        if not os.path.exists(self.ledger_path):
+            self._import_legacy_counter()
+
+    def _read(self):
+        try:
+            with open(self.ledger_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _import_legacy_counter(self):
+        """Carry a usage_counter.txt total over as this month's 'legacy' usage"""
+        if not self.counter_path or not os.path.exists(self.counter_path):
+            return
+        try:
+            with open(self.counter_path, "r") as f:
+                count = int(f.read().strip() or 0)
+        except ValueError:
+            return
+        if count:
+            self._pending[(current_month(), "legacy")] += count
+            self.flush()
+
+    def record(self, sku, count=1):
+        """Count API calls against a SKU for the current month"""
+        with self._lock:
+            self._pending[(current_month(), sku)] += count
+            self._pending_calls += count
+            if (self._pending_calls >= self.flush_every or
+                    time.monotonic() - self._last_flush >= self.flush_interval):
+                try:
+                    self.flush()
+                except (OSError, TimeoutError) as e:
+                    # Counting must never cost a call that was already paid for; retry next interval
+                    print(f"⚠️ Could not write usage ledger, keeping {self._pending_calls} calls pending: {e}")
+
+    def reserve(self, count, limit):
+        """Hold count calls if this month's usage plus every hold stays within limit; returns whether it did"""
+        with self._lock:
+            if self.used() + self._held + count > limit:
+                return False
+            self._held += count
+            return True
+
+    def release(self, count):
+        """Drop a hold once its work is done; the calls it made are counted by record() by then"""
+        with self._lock:
+            self._held = max(0, self._held - count)
+
+    def used(self, month=None):
+        """Total calls this month (or the given YYYY-MM), including unflushed ones"""
+        month = month or current_month()
+        with self._lock:
+            total = sum(self._totals.get(month, {}).values())
+            return total + sum(n for (m, _), n in self._pending.items() if m == month)
+
+    def by_sku(self, month=None):
+        """Calls per SKU for this month (or the given YYYY-MM)"""
+        month = month or current_month()
+        with self._lock:
+            usage = dict(self._totals.get(month, {}))
+            for (m, sku), n in self._pending.items():
+                if m == month:
+                    usage[sku] = usage.get(sku, 0) + n
+            return usage
+
+    def flush(self):
+        """Merge pending usage into the ledger file under the file lock"""
+        with self._lock:
+            self._last_flush = time.monotonic()
+            with file_lock(self.ledger_path):
+                totals = self._read()
+                for (month, sku), n in self._pending.items():
+                    totals.setdefault(month, {})
+                    totals[month][sku] = totals[month].get(sku, 0) + n
+                tmp_path = f"{self.ledger_path}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(totals, f, indent=2, sort_keys=True)
+                os.replace(tmp_path, self.ledger_path)
+                if self.counter_path:
+                    with open(self.counter_path, "w") as f:
+                        f.write(str(sum(totals.get(current_month(), {}).values())))
+            self._totals = totals
+            self._pending.clear()
+            self._pending_calls = 0
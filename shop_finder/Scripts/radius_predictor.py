@@ -0,0 +1,214 @@
+import math
+from collections import defaultdict
+
+from shop_finder.Scripts.search_subdivider import SATURATED_RESULTS
+from shop_finder.Scripts.storage import read_csv_rows
+
+EARTH_RADIUS_KM = 6371.0
+
+# Kernel bandwidth for weighting nearby history
+BANDWIDTH_KM = 40.0
+# Ignore history further away than this many bandwidths
+CUTOFF_BANDWIDTHS = 3
+# Need at least this much kernel weight before trusting a prediction
+MIN_WEIGHT = 0.05
+
+# Results a saved optimal radius is assumed to have returned when the row has no count
+ASSUMED_RESULTS = 45
+# Predictions aim for the middle of the good 45-60 window
+AIM_RESULTS = 52
+# Probes run between prediction / BRACKET and prediction * BRACKET
+BRACKET = 1.5
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2 +
+         math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def circle_area_km2(radius_m):
+    return math.pi * (radius_m / 1000) ** 2
+
+
+class RadiusPredictor:
+    """
+    Predicts a starting search radius from nearby search history.
+
+    Every past (query, lat, lng, radius, results) gives a store density
+    (results per km²). For a new point the densities of the same query are
+    combined with a Gaussian kernel on distance (geometric mean, since
+    densities span orders of magnitude), and the radius expected to return
+    target results at that density is the prediction.
+
+    Searches that hit SATURATED_RESULTS only give a lower bound on the
+    density. They are kept apart and can only raise the estimate (and so
+    shrink the radius), never stand in for it.
+    """
+
+    def __init__(self, bandwidth_km=BANDWIDTH_KM):
+        self.bandwidth_km = bandwidth_km
+        # query -> (lat cell, lng cell) -> [(lat, lng, log density)]
+        self._cells = defaultdict(lambda: defaultdict(list))
+        # Same layout for saturated searches, whose log density is a floor
+        self._floor_cells = defaultdict(lambda: defaultdict(list))
+        self.size = 0
+
+    def add(self, query, lat, lng, radius, results=None):
+        """Record one finished search; results defaults to ASSUMED_RESULTS"""
+        results = ASSUMED_RESULTS if results in (None, "") else int(results)
+        radius = int(float(radius))
+        if radius <= 0 or results <= 0:
+            return
+        lat, lng = float(lat), float(lng)
+        density = results / circle_area_km2(radius)
+        if results >= SATURATED_RESULTS:
+            self._floor_cells[query][(math.floor(lat), math.floor(lng))].append((lat, lng, math.log(density)))
+            return
+        self._cells[query][(math.floor(lat), math.floor(lng))].append((lat, lng, math.log(density)))
+        self.size += 1
+
+    def predict_density(self, query, lat, lng, exclude=None):
+        """
+        Kernel estimate of results per km² around a point, or None without
+        enough history. Nearby saturated searches raise it to their own
+        estimate when that is higher.
+        """
+        density = self._kernel_density(self._cells.get(query), lat, lng, exclude)
+        if density is None:
+            return None
+        floor = self._kernel_density(self._floor_cells.get(query), lat, lng, exclude)
+        return density if floor is None else max(density, floor)
+
+    def _kernel_density(self, cells, lat, lng, exclude=None):
+        if not cells:
+            return None
+        reach_km = self.bandwidth_km * CUTOFF_BANDWIDTHS
+        lat_span = math.ceil(reach_km / 111.0)
+        lng_span = math.ceil(reach_km / (111.0 * max(math.cos(math.radians(lat)), 0.1)))
+        cell_lat, cell_lng = math.floor(lat), math.floor(lng)
+        total_weight = weighted_log = 0.0
+        for d_lat in range(-lat_span, lat_span + 1):
+            for d_lng in range(-lng_span, lng_span + 1):
+                for obs in cells.get((cell_lat + d_lat, cell_lng + d_lng), ()):
+                    if obs is exclude:
+                        continue
+                    distance = haversine_km(lat, lng, obs[0], obs[1])
+                    if distance > reach_km:
+                        continue
+                    weight = math.exp(-0.5 * (distance / self.bandwidth_km) ** 2)
+                    total_weight += weight
+                    weighted_log += weight * obs[2]
+        if total_weight < MIN_WEIGHT:
+            return None
+        return math.exp(weighted_log / total_weight)
+
+    def predict_radius(self, query, lat, lng, target_results=AIM_RESULTS,
+                       min_radius=1000, max_radius=50000, exclude=None):
+        """Radius in meters expected to return target_results, or None without enough history"""
+        density = self.predict_density(query, lat, lng, exclude)
+        if not density:
+            return None
+        radius = math.sqrt(target_results / (math.pi * density)) * 1000
+        return int(min(max(radius, min_radius), max_radius))
+
+    def bracket(self, radius, min_radius=1000, max_radius=50000):
+        """Narrow (low, high) probe range around a predicted radius"""
+        return max(min_radius, int(radius / BRACKET)), min(max_radius, int(radius * BRACKET))
+
+    def observations(self):
+        """Yield (query, obs) for every recorded search, for replaying history"""
+        for query, cells in self._cells.items():
+            for cell in cells.values():
+                for obs in cell:
+                    yield query, obs
+
+    @classmethod
+    def from_rows(cls, optimal_radii_rows, search_log_rows=()):
+        """
+        Build a predictor from optimal radii rows and, when rows carry a
+        results count, search log rows.
+        """
+        predictor = cls()
+        for row in optimal_radii_rows:
+            predictor.add(row["query"], row["lat"], row["lng"], row["radius"], row.get("results"))
+        for row in search_log_rows:
+            # Without a count a logged circle tells us nothing about density
+            if row.get("results"):
+                predictor.add(row["query"], row["lat"], row["lng"], row["radius_m"], row["results"])
+        return predictor
+
+    @classmethod
+    def from_history(cls, optimal_radii_file, search_log_file=None):
+        """Build a predictor from optimal_radii.csv and search_log.csv"""
+        return cls.from_rows(read_csv_rows(optimal_radii_file), read_csv_rows(search_log_file))
+
+
+def binary_search_radius(probe, min_radius, max_radius, target_results, best_radius=None, best_count=0):
+    """The original bisection: largest radius in [min, max] with at most target_results"""
+    probes = 0
+    best_radius = max_radius if best_radius is None else best_radius
+    while min_radius <= max_radius:
+        current_radius = (min_radius + max_radius) // 2
+        result_count = probe(current_radius)
+        probes += 1
+        if result_count is None:
+            return None, 0, probes
+        if result_count <= target_results:
+            best_radius, best_count = current_radius, result_count
+            min_radius = current_radius + 1
+        else:
+            max_radius = current_radius - 1
+    return best_radius, best_count, probes
+
+
+def predicted_search_radius(probe, predicted, low, high, target_results, good_results=ASSUMED_RESULTS):
+    """
+    Probe the predicted radius first and accept it if it lands in the good
+    window (good_results..target_results); otherwise bisect only the half of
+    the bracket the first probe points to.
+    """
+    result_count = probe(predicted)
+    if result_count is None:
+        return None, 0, 1
+    if good_results <= result_count <= target_results:
+        return predicted, result_count, 1
+    if result_count > target_results:
+        radius, count, probes = binary_search_radius(probe, low, predicted - 1, target_results, low, 0)
+    else:
+        radius, count, probes = binary_search_radius(
+            probe, predicted + 1, high, target_results, predicted, result_count
+        )
+    return radius, count, probes + 1
+
+
+def replay_history(predictor, target_results=60, good_results=ASSUMED_RESULTS, min_radius=1000, max_radius=50000):
+    """
+    Leave-one-out replay: for every recorded search, pretend its true density
+    is what we observed and count the probes each strategy would bill.
+    Result counts are modelled as density * area, uncapped, so both
+    strategies can tell when a radius is too large.
+    """
+    report = {"searches": 0, "predicted": 0, "plain_probes": 0, "predicted_probes": 0}
+    for query, obs in predictor.observations():
+        density = math.exp(obs[2])
+
+        def probe(radius):
+            return int(density * circle_area_km2(radius))
+
+        _, _, plain = binary_search_radius(probe, min_radius, max_radius, target_results)
+        prediction = predictor.predict_radius(
+            query, obs[0], obs[1], AIM_RESULTS, min_radius, max_radius, exclude=obs
+        )
+        if prediction is None:
+            guided = plain
+        else:
+            low, high = predictor.bracket(prediction, min_radius, max_radius)
+            _, _, guided = predicted_search_radius(probe, prediction, low, high, target_results, good_results)
+            report["predicted"] += 1
+        report["searches"] += 1
+        report["plain_probes"] += plain
+        report["predicted_probes"] += guided
+    report["calls_saved"] = report["plain_probes"] - report["predicted_probes"]
+    return report
@@ -0,0 +1,148 @@
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Requests per second and burst size for each Places endpoint
+RATE_LIMITS = {
+    "text_search": (10.0, 10),
+    "details": (10.0, 10),
+}
+
+# next_page_token is only accepted a short while after Google issues it
+PAGE_TOKEN_MIN_DELAY = 2.0
+PAGE_TOKEN_RETRY_DELAY = 1.0
+PAGE_TOKEN_MAX_RETRIES = 5
+
+# Backoff after network errors: 1s, 2s, 4s, ... capped
+NETWORK_BACKOFF_BASE = 1.0
+NETWORK_BACKOFF_MAX = 10.0
+
+# Throttle stats are wall time: a stretch counts once while at least one thread waits,
+# however many threads wait through it. The None key tracks waits on any limiter.
+_stats_lock = threading.Lock()
+_throttled = defaultdict(float)
+_waiters = defaultdict(int)
+_wait_started = {}
+
+
+@contextmanager
+def _waiting(name):
+    """Count the enclosed wait towards name's (and the overall) throttled wall time"""
+    with _stats_lock:
+        now = time.monotonic()
+        for key in (name, None):
+            if _waiters[key] == 0:
+                _wait_started[key] = now
+            _waiters[key] += 1
+    try:
+        yield
+    finally:
+        with _stats_lock:
+            now = time.monotonic()
+            for key in (name, None):
+                _waiters[key] -= 1
+                if _waiters[key] == 0:
+                    _throttled[key] += now - _wait_started.pop(key)
+
+
+def throttled_sleep(name, seconds):
+    """Sleep and count the time against the given limiter in the throttle stats"""
+    if seconds > 0:
+        with _waiting(name):
+            time.sleep(seconds)
+
+
+def get_throttle_stats():
+    """Seconds of wall time during which at least one thread waited, per limiter"""
+    with _stats_lock:
+        return {name: seconds for name, seconds in _throttled.items() if name is not None}
+
+
+def get_throttled_time():
+    """Seconds of wall time during which at least one thread waited on any limiter"""
+    with _stats_lock:
+        return _throttled[None]
+
+
+def reset_throttle_stats():
+    with _stats_lock:
+        _throttled.clear()
+
+
+class TokenBucket:
+    """Thread-safe token bucket: waits only as long as the configured rate requires"""
+
+    def __init__(self, name, rate, capacity):
+        self.name = name
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1):
+        """Take tokens, sleeping until they are available. Returns seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    break
+                wait = (tokens - self._tokens) / self.rate
+            with _waiting(self.name):
+                time.sleep(wait)
+            waited += wait
+        return waited
+
+
+class PageTokenGate:
+    """Holds back a page-token request until the token has had time to become valid"""
+
+    def __init__(self, min_delay=None):
+        self.min_delay = PAGE_TOKEN_MIN_DELAY if min_delay is None else min_delay
+        self._issued_at = None
+
+    def issued(self):
+        """Call when a response hands out a next_page_token"""
+        self._issued_at = time.monotonic()
+
+    def wait(self):
+        """Sleep only for whatever is left of the minimum delay"""
+        if self._issued_at is None:
+            return 0.0
+        remaining = self.min_delay - (time.monotonic() - self._issued_at)
+        throttled_sleep("page_token", remaining)
+        return max(remaining, 0.0)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name):
+    """Shared token bucket for an endpoint listed in RATE_LIMITS"""
+    with _limiters_lock:
+        if name not in _limiters:
+            rate, capacity = RATE_LIMITS[name]
+            _limiters[name] = TokenBucket(name, rate, capacity)
+        return _limiters[name]
+
+
+def configure_limits(limits):
+    """Override RATE_LIMITS entries, e.g. {"details": (5.0, 5)}"""
+    with _limiters_lock:
+        RATE_LIMITS.update(limits)
+        for name in limits:
+            _limiters.pop(name, None)
+
+
+def network_backoff(attempt):
+    """Delay before retrying after the given number of consecutive network errors"""
+    return min(NETWORK_BACKOFF_BASE * (2 ** max(attempt - 1, 0)), NETWORK_BACKOFF_MAX)
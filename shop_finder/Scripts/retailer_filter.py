@@ -0,0 +1,102 @@
+import csv
+import os
+from collections import deque
+
+from shop_finder.config import FILES
+
+
+class ExclusionMatcher:
+    """
+    Aho-Corasick automaton over the excluded retailer names.
+
+    A store is excluded when any retailer name appears anywhere in its
+    (lowercased) name, same as the old substring test, but each name is
+    scanned once no matter how many retailers are on the list.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = {p.strip().lower() for p in patterns if p and p.strip()}
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [False]
+        for pattern in self.patterns:
+            self._insert(pattern)
+        self._build_links()
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def _insert(self, pattern):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(False)
+            state = next_state
+        self._output[state] = True
+
+    def _build_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                # A state matches if any suffix of it is a full pattern
+                self._output[next_state] = self._output[next_state] or self._output[self._fail[next_state]]
+
+    def matches(self, name):
+        """Check if a store name contains any excluded retailer"""
+        if not self.patterns or not name:
+            return False
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for char in name.strip().lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                return True
+        return False
+
+    def filter_names(self, names):
+        """Batch check: one bool per name, True where the name is excluded"""
+        return [self.matches(name) for name in names]
+
+
+_matcher_cache = {}
+
+def load_exclusion_matcher(file_path=FILES["excluded_retailers"]):
+    """
+    Compile excluded_retailers.csv into an ExclusionMatcher.
+    The compiled matcher is cached until the file's mtime or size changes.
+    """
+    try:
+        stat = os.stat(file_path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        stamp = None
+
+    cached = _matcher_cache.get(file_path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    excluded_retailers = set()
+    if stamp is None:
+        print("⚠️ Warning: excluded_retailers.csv not found. No retailers will be excluded.")
+    else:
+        with open(file_path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                excluded_retailers.add(row["retailer_name"].strip().lower())
+
+    matcher = ExclusionMatcher(excluded_retailers)
+    _matcher_cache[file_path] = (stamp, matcher)
+    return matcher
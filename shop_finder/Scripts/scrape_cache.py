@@ -0,0 +1,153 @@
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+DEFAULT_TTL_DAYS = 30
+DEFAULT_MAX_ENTRIES = 50000
+# Stores between checks of the entry cap, so inserts do not count the table every time
+EVICT_EVERY = 500
+
+
+def normalize_url(url):
+    """Cache key for a website: lowercase host without www., no scheme, query or trailing slash"""
+    parsed = urlparse(url if "//" in url else f"//{url}")
+    host = parsed.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return f"{host}{parsed.path.rstrip('/')}"
+
+
+class ScrapeCache:
+    """
+    Emails scraped from shop websites, keyed by normalized URL.
+
+    Entries younger than the TTL are served without touching the network.
+    Older ones are revalidated with a conditional GET using the stored
+    ETag / Last-Modified, so an unchanged site costs a 304 and no parsing.
+    The table is capped at max_entries, evicting the least recently used
+    every EVICT_EVERY stores (so it can run up to that far over in between).
+    """
+
+    def __init__(self, db_path, ttl_days=DEFAULT_TTL_DAYS, max_entries=DEFAULT_MAX_ENTRIES):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_days * 24 * 60 * 60
+        self.max_entries = max_entries
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.evicted = 0
+        self._stores_since_evict = 0
+        self._lock = threading.Lock()
+        self._db = None
+
+    def _connect(self):
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS scraped_sites (
+                    url_key TEXT PRIMARY KEY,
+                    email TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_scraped_last_used ON scraped_sites (last_used)")
+        return self._db
+
+    def lookup(self, url):
+        """
+        Cached entry for a URL as a dict with email, etag, last_modified and
+        fresh (still inside the TTL), or None if the site was never scraped.
+        A missing or stale entry counts as a miss.
+        """
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT email, etag, last_modified, fetched_at FROM scraped_sites WHERE url_key = ?",
+                (normalize_url(url),)
+            ).fetchone()
+            fresh = row is not None and time.time() - row[3] <= self.ttl_seconds
+            if not fresh:
+                self.misses += 1
+        if row is None:
+            return None
+        email, etag, last_modified, _ = row
+        return {
+            "email": email,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fresh": fresh
+        }
+
+    @staticmethod
+    def conditional_headers(entry):
+        """If-None-Match / If-Modified-Since headers for revalidating an entry"""
+        headers = {}
+        if entry:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def record_hit(self, url):
+        """A fresh entry was served without a request"""
+        with self._lock:
+            self.hits += 1
+            self._connect().execute(
+                "UPDATE scraped_sites SET last_used = ? WHERE url_key = ?", (time.time(), normalize_url(url))
+            )
+            self._db.commit()
+
+    def record_not_modified(self, url):
+        """The site answered 304 to a stale entry's miss: keep the emails and restart the TTL"""
+        now = time.time()
+        with self._lock:
+            self.revalidated += 1
+            self._connect().execute(
+                "UPDATE scraped_sites SET fetched_at = ?, last_used = ? WHERE url_key = ?",
+                (now, now, normalize_url(url))
+            )
+            self._db.commit()
+
+    def store(self, url, email, etag=None, last_modified=None):
+        """Save the result of a full fetch; every EVICT_EVERY stores, evict the oldest entries past the cap"""
+        now = time.time()
+        with self._lock:
+            db = self._connect()
+            db.execute("""
+                INSERT OR REPLACE INTO scraped_sites (url_key, email, etag, last_modified, fetched_at, last_used)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (normalize_url(url), email or "", etag, last_modified, now, now))
+            self._stores_since_evict += 1
+            if self._stores_since_evict >= EVICT_EVERY:
+                self._evict(db)
+            db.commit()
+
+    def _evict(self, db):
+        """Delete the least recently used entries past max_entries"""
+        self._stores_since_evict = 0
+        overflow = db.execute("SELECT COUNT(*) FROM scraped_sites").fetchone()[0] - self.max_entries
+        if overflow > 0:
+            db.execute("""
+                DELETE FROM scraped_sites WHERE url_key IN (
+                    SELECT url_key FROM scraped_sites ORDER BY last_used ASC LIMIT ?
+                )
+            """, (overflow,))
+            self.evicted += overflow
+
+    def stats(self):
+        """Counts for this run; revalidated (304) lookups are misses that still avoided a download"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "evicted": self.evicted,
+            "hit_rate": ((self.hits + self.revalidated) / lookups * 100) if lookups else 0.0
+        }
@@ -0,0 +1,48 @@
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+# Global cap on Details lookups + website scrapes running at once
+MAX_IN_FLIGHT = 8
+# Never hit the same shop website with more than this many requests at once
+MAX_PER_HOST = 2
+
+
+class HostLimiter:
+    """Per-host concurrency limit, so chains sharing one domain are not hammered"""
+
+    def __init__(self, max_per_host=MAX_PER_HOST):
+        self.max_per_host = max_per_host
+        self._lock = threading.Lock()
+        self._semaphores = defaultdict(lambda: threading.BoundedSemaphore(self.max_per_host))
+
+    @contextmanager
+    def slot(self, url):
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            semaphore = self._semaphores[host]
+        with semaphore:
+            yield
+
+
+def scrape_places(place_ids, get_website, extract_email,
+                  max_in_flight=MAX_IN_FLIGHT, max_per_host=MAX_PER_HOST):
+    """
+    Look up the website for each place and scrape an email from it, concurrently.
+    Returns a list of (website, email) tuples in the same order as place_ids.
+    """
+    if not place_ids:
+        return []
+    limiter = HostLimiter(max_per_host)
+
+    def scrape_one(place_id):
+        website = get_website(place_id)
+        if not website:
+            return website, ""
+        with limiter.slot(website):
+            return website, extract_email(website)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_in_flight, len(place_ids)))) as pool:
+        return list(pool.map(scrape_one, place_ids))
@@ -0,0 +1,146 @@
+import json
+import sqlite3
+import threading
+
+FIELDNAMES = ["Skip?", "Status", "city", "lat", "lng", "radius", "query"]
+
+
+def parse_cell(convert, value):
+    """convert(value), or None for a blank or malformed cell"""
+    try:
+        return convert(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def to_int(value):
+    return int(float(value))
+
+
+class SearchConfigStore:
+    """
+    The search_config table (see storage.py) loaded into an indexed
+    in-memory SQLite table.
+
+    Skip/status updates and new child circles become single-row statements
+    against the table; the stored table is only rewritten when flush() is
+    called, once at the end of a run. Values are kept as the original
+    strings, and columns beyond FIELDNAMES (e.g. a user's notes) are kept
+    as JSON in extra, so untouched rows round-trip unchanged; a lat, lng or radius
+    that does not parse is stored as NULL, which is only an error on rows
+    that are not skipped.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self.fieldnames = list(FIELDNAMES)
+        self.exists = False
+        self.dirty = False
+        self._lock = threading.RLock()
+        self.db = sqlite3.connect(":memory:", check_same_thread=False)
+        self.db.execute("""
+            CREATE TABLE configs (
+                id INTEGER PRIMARY KEY,
+                skip TEXT, status TEXT, city TEXT, lat TEXT, lng TEXT, radius TEXT, query TEXT,
+                lat_f REAL, lng_f REAL, radius_i INTEGER, extra TEXT
+            )
+        """)
+        self.db.execute("CREATE INDEX idx_configs_key ON configs (city, query, lat_f, lng_f)")
+        self.load()
+
+    def load(self):
+        """
+        Import the stored search config into the in-memory table. Raises
+        ValueError if a row that will run has a bad lat, lng or radius.
+        """
+        if not self.table.exists:
+            return
+        self.exists = True
+        self.fieldnames = self.table.fieldnames()
+        rows = []
+        bad_lines = []
+        # Line 1 is the header
+        for line, row in enumerate(self.table.rows(), start=2):
+            skip = row.get("Skip?") or ""
+            lat_f, lng_f = parse_cell(float, row.get("lat")), parse_cell(float, row.get("lng"))
+            radius_i = parse_cell(to_int, row.get("radius"))
+            if skip.lower() != "yes" and None in (lat_f, lng_f, radius_i):
+                bad_lines.append(str(line))
+            extra = {field: value for field, value in row.items() if field not in FIELDNAMES}
+            rows.append((skip, row.get("Status") or "", row.get("city"), row.get("lat"), row.get("lng"),
+                         row.get("radius"), row.get("query"), lat_f, lng_f, radius_i,
+                         json.dumps(extra) if extra else None))
+        if bad_lines:
+            raise ValueError(f"Search config rows with a bad lat, lng or radius (fix them or set Skip? to Yes): "
+                             f"line {', '.join(bad_lines)}")
+        with self._lock:
+            self.db.executemany("""
+                INSERT INTO configs (skip, status, city, lat, lng, radius, query, lat_f, lng_f, radius_i, extra)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+
+    def active_searches(self):
+        """Rows not marked Skip? = Yes, in file order"""
+        with self._lock:
+            return self.db.execute("""
+                SELECT city, lat, lng, radius_i, query FROM configs
+                WHERE lower(skip) != 'yes' ORDER BY id
+            """).fetchall()
+
+    def set_skip(self, city, lat, lng, query):
+        """Mark a search as Skip? = Yes"""
+        with self._lock:
+            cursor = self.db.execute("""
+                UPDATE configs SET skip = 'Yes'
+                WHERE city = ? AND query = ? AND lat_f = ? AND lng_f = ?
+            """, (city, query, float(lat), float(lng)))
+            self.dirty = self.dirty or cursor.rowcount > 0
+
+    def set_status(self, city, lat, lng, query, status, new_radius=None):
+        """Update the Status and optionally the radius of a search"""
+        with self._lock:
+            if new_radius is None:
+                cursor = self.db.execute("""
+                    UPDATE configs SET status = ?
+                    WHERE city = ? AND query = ? AND lat_f = ? AND lng_f = ?
+                """, (status, city, query, float(lat), float(lng)))
+            else:
+                cursor = self.db.execute("""
+                    UPDATE configs SET status = ?, radius = ?, radius_i = ?
+                    WHERE city = ? AND query = ? AND lat_f = ? AND lng_f = ?
+                """, (status, str(new_radius), int(new_radius), city, query, float(lat), float(lng)))
+            self.dirty = self.dirty or cursor.rowcount > 0
+
+    def add(self, city, lat, lng, radius, query):
+        """Queue a new search unless the exact same one is already configured"""
+        with self._lock:
+            existing = self.db.execute("""
+                SELECT 1 FROM configs
+                WHERE city = ? AND query = ? AND lat_f = ? AND lng_f = ? AND radius_i = ?
+                LIMIT 1
+            """, (city, query, float(lat), float(lng), int(radius))).fetchone()
+            if existing:
+                return False
+            self.db.execute("""
+                INSERT INTO configs (skip, status, city, lat, lng, radius, query, lat_f, lng_f, radius_i)
+                VALUES ('No', '', ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (city, str(lat), str(lng), str(radius), query, float(lat), float(lng), int(radius)))
+            self.dirty = True
+            self.exists = True
+            return True
+
+    def flush(self):
+        """Write the table back to storage if anything changed"""
+        with self._lock:
+            if not self.dirty:
+                return
+            rows = []
+            for *values, extra in self.db.execute(
+                "SELECT skip, status, city, lat, lng, radius, query, extra FROM configs ORDER BY id"
+            ):
+                row = dict(zip(FIELDNAMES, values))
+                if extra:
+                    row.update(json.loads(extra))
+                rows.append(row)
+            self.table.rewrite(rows, self.fieldnames)
+            self.dirty = False
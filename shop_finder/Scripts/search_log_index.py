@@ -0,0 +1,63 @@
+import csv
+import math
+import os
+from collections import defaultdict
+
+# Same tolerance has_already_searched has always used for matching coordinates
+COORD_TOLERANCE = 0.0001
+
+
+class SearchLogIndex:
+    """
+    In-memory index of completed searches from search_log.csv.
+
+    Rows are hashed on (query, city, radius) and then bucketed into a lat/lng
+    grid whose cell size equals the coordinate tolerance, so a lookup only has
+    to compare against the handful of points in the 3x3 neighbouring cells.
+    """
+
+    def __init__(self, tolerance=COORD_TOLERANCE):
+        self.tolerance = tolerance
+        self._buckets = defaultdict(lambda: defaultdict(list))
+        self.size = 0
+
+    def _cell(self, lat, lng):
+        return (math.floor(lat / self.tolerance), math.floor(lng / self.tolerance))
+
+    def add(self, query, city, lat, lng, radius):
+        """Record a completed search in the index"""
+        lat, lng = float(lat), float(lng)
+        cells = self._buckets[(query, city, int(radius))]
+        cells[self._cell(lat, lng)].append((lat, lng))
+        self.size += 1
+
+    def contains(self, query, city, lat, lng, radius):
+        """Check if a search within the coordinate tolerance was already logged"""
+        cells = self._buckets.get((query, city, int(radius)))
+        if not cells:
+            return False
+        lat, lng = float(lat), float(lng)
+        cell_lat, cell_lng = self._cell(lat, lng)
+        for d_lat in (-1, 0, 1):
+            for d_lng in (-1, 0, 1):
+                for logged_lat, logged_lng in cells.get((cell_lat + d_lat, cell_lng + d_lng), ()):
+                    if (abs(logged_lat - lat) < self.tolerance and
+                            abs(logged_lng - lng) < self.tolerance):
+                        return True
+        return False
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build an index from search log rows"""
+        index = cls()
+        for row in rows:
+            index.add(row["query"], row["city"], row["lat"], row["lng"], row["radius_m"])
+        return index
+
+    @classmethod
+    def from_csv(cls, log_file):
+        """Build an index from a search_log.csv file"""
+        if not os.path.exists(log_file):
+            return cls()
+        with open(log_file, newline="", encoding="utf-8") as f:
+            return cls.from_rows(csv.DictReader(f))
@@ -9,6 +9,9 @@ SUBDIVISION_RULES = {
     3000: (1500, 7)     # 3km -> 7 circles of 1.5km
 }
 
+# Google returns at most this many results, so a search that hits it may have missed stores
+SATURATED_RESULTS = 60
+
 def generate_child_centers(lat, lng, parent_radius, child_radius, count):
     """Generate coordinates of child circle centers using fixed offsets."""
     centers = []
@@ -49,8 +52,32 @@ def get_subdivision_centers(lat, lng, radius):
     child_radius, count = SUBDIVISION_RULES[radius]
     return generate_child_centers(lat, lng, radius, child_radius, count)
 
+def get_density_subdivision_centers(lat, lng, radius, result_coords, min_results=1):
+    """
+    Like get_subdivision_centers, but only keeps child circles whose sector
+    actually holds stores. Each result is assigned to its nearest child
+    center, and children with fewer than min_results are dropped.
+    Falls back to the full fixed ring when no result coordinates are known.
+    """
+    centers = get_subdivision_centers(lat, lng, radius)
+    if not centers or not result_coords:
+        return centers
+
+    # Flat-earth distances are plenty to pick the nearest child inside one circle
+    lng_scale = math.cos(math.radians(lat))
+    counts = [0] * len(centers)
+    for result_lat, result_lng in result_coords:
+        nearest = min(
+            range(len(centers)),
+            key=lambda i: (centers[i][0] - result_lat) ** 2 + ((centers[i][1] - result_lng) * lng_scale) ** 2
+        )
+        counts[nearest] += 1
+
+    dense = [center for center, count in zip(centers, counts) if count >= min_results]
+    return dense or centers
+
 def should_subdivide(radius, result_count):
     """
     Determine if a search area should be subdivided based on its radius and result count.
     """
-    return radius in SUBDIVISION_RULES and result_count >= 60 
\ No newline at end of file
+    return radius in SUBDIVISION_RULES and result_count >= SATURATED_RESULTS 
\ No newline at end of file
@@ -0,0 +1,454 @@
+"""
+Storage for the search log, optimal radii, search config and store lists.
+
+get_table(name) returns a table with the same small interface on either
+backend, picked by STORAGE_BACKEND in config.py:
+
+- "csv": the files in FILES, exactly as before. Appends go to the end of
+  the file and key lookups use a persisted CsvKeyIndex sidecar.
+- "sqlite": one database (FILES["database"]) with an index on each table's
+  key. Tables are imported from their CSV the first time they are opened,
+  and can be exported back to CSV for the spreadsheet workflow.
+
+Either backend can also be exported to Parquet (needs pyarrow) for bulk
+analytics:
+
+    python -m shop_finder.Scripts.storage export
+    python -m shop_finder.Scripts.storage export --format parquet --out exports
+    python -m shop_finder.Scripts.storage import search_config
+"""
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import threading
+
+from shop_finder.config import FILES, STORAGE_BACKEND
+from shop_finder.Scripts.csv_key_index import CsvKeyIndex, row_key
+from shop_finder.Scripts.search_config_store import FIELDNAMES as SEARCH_CONFIG_FIELDS
+
+SEARCH_LOG_FIELDS = ["query", "city", "lat", "lng", "radius_m", "date", "results"]
+OPTIMAL_RADII_FIELDS = ["query", "city", "lat", "lng", "radius", "results"]
+STORE_FIELDS = ["sorted", "query", "city", "location_id", "coordinates", "name", "address", "website", "email", "flagged"]
+
+# Bytes before a CSV watermark that are hashed to notice rewrites of the part before it
+WATERMARK_TAIL_BYTES = 4096
+# Read size when copying the part of a CSV before a watermark
+COPY_CHUNK_BYTES = 1024 * 1024
+
+
+def optimal_radius_key(row):
+    """(city, lat, lng, query) with coordinates compared as numbers, like is_optimal_radius_saved always has"""
+    return (row["city"], repr(float(row["lat"])), repr(float(row["lng"])), row["query"])
+
+
+TABLES = {
+    "search_log": {"file": FILES["search_log"], "columns": SEARCH_LOG_FIELDS},
+    "optimal_radii": {"file": FILES["optimal_radii"], "columns": OPTIMAL_RADII_FIELDS, "key": optimal_radius_key},
+    "search_config": {"file": FILES["search_config"], "columns": SEARCH_CONFIG_FIELDS},
+    "master_list": {
+        "file": FILES["master_list"], "columns": STORE_FIELDS, "key": row_key,
+        "key_sidecar": FILES["master_list_index"], "watermark": FILES["master_list_offset"]
+    },
+    "with_emails": {"file": FILES["with_emails"], "columns": STORE_FIELDS, "key": row_key},
+    "without_emails": {"file": FILES["without_emails"], "columns": STORE_FIELDS, "key": row_key},
+}
+
+
+def read_header(file_path):
+    """First row of a CSV, or None if the file is missing or empty"""
+    if not os.path.exists(file_path):
+        return None
+    with open(file_path, newline="", encoding="utf-8") as f:
+        return next(csv.reader(f), None)
+
+
+def read_csv_rows(file_path):
+    """Rows of a CSV, or nothing if the file is missing"""
+    if not file_path or not os.path.exists(file_path):
+        return
+    with open(file_path, newline="", encoding="utf-8") as f:
+        yield from csv.DictReader(f)
+
+
+def write_csv(file_path, rows, fieldnames):
+    """Write a whole CSV through a temp file so readers never see half of it"""
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(tmp_path, file_path)
+
+
+def _ends_with_newline(file_path):
+    with open(file_path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def _tail_digest(file_path, offset):
+    with open(file_path, "rb") as f:
+        f.seek(max(offset - WATERMARK_TAIL_BYTES, 0))
+        tail = f.read(min(offset, WATERMARK_TAIL_BYTES))
+    return hashlib.blake2b(tail, digest_size=16).hexdigest()
+
+
+class CsvTable:
+    """A table stored as one CSV file, appended in place"""
+
+    def __init__(self, name, path, columns, key=None, key_sidecar=None, watermark=None):
+        self.name = name
+        self.path = path
+        self.columns = list(columns)
+        self.watermark_path = watermark
+        self._index = CsvKeyIndex(path, key_sidecar, key) if key else None
+        self._lock = threading.RLock()
+
+    @property
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def fieldnames(self):
+        """Header of the file (older files may lack newer columns), or the default columns"""
+        return read_header(self.path) or list(self.columns)
+
+    def rows(self):
+        """Yield every row as a dict of strings, in file order"""
+        if not self.exists:
+            return
+        with open(self.path, newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+
+    def append(self, rows):
+        """
+        Add rows at the end of the file, writing the header if the file is
+        new. A file whose header predates a column the rows carry (e.g.
+        results) is rewritten once with that column added, instead of the
+        values being dropped.
+        """
+        rows = list(rows)
+        with self._lock:
+            if self._index is not None:
+                self._index.refresh()
+            is_new = not self.exists or os.path.getsize(self.path) == 0
+            fieldnames = self.fieldnames()
+            missing = [column for column in self.columns
+                       if column not in fieldnames and any(column in row for row in rows)]
+            if missing and not is_new:
+                fieldnames = fieldnames + missing
+                write_csv(self.path, self.rows(), fieldnames)
+                if self._index is not None:
+                    self._index.add([])  # same keys, new file stamp
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
+                if is_new:
+                    writer.writeheader()
+                elif not _ends_with_newline(self.path):
+                    f.write("\n")  # hand-edited files often lack the final line break
+                writer.writerows(rows)
+            if self._index is not None:
+                self._index.add(rows)
+
+    def rewrite(self, rows, fieldnames=None, same_keys=False):
+        """
+        Replace the whole table. same_keys=True promises the rows have the
+        same set of keys as before (e.g. only duplicates were dropped), so
+        the key index is kept instead of rebuilt.
+        """
+        with self._lock:
+            if same_keys and self._index is not None:
+                self._index.refresh()
+            write_csv(self.path, rows, fieldnames or self.fieldnames())
+            if self._index is not None:
+                if same_keys:
+                    self._index.add([])
+                else:
+                    self._index.rebuild()
+
+    def has_key(self, row):
+        """O(1) check whether a row with the same key is already stored"""
+        with self._lock:
+            return self._index.contains_row(row)
+
+    def read_watermark(self):
+        """Byte offset recorded by write_watermark, or None if the file changed before it"""
+        try:
+            with open(self.watermark_path, encoding="utf-8") as f:
+                mark = json.load(f)
+            offset = mark["offset"]
+            if os.path.getsize(self.path) < offset or _tail_digest(self.path, offset) != mark.get("tail"):
+                return None
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return offset
+
+    def write_watermark(self):
+        """Record that everything currently in the file has been processed"""
+        offset = os.path.getsize(self.path)
+        with open(self.watermark_path, "w", encoding="utf-8") as f:
+            json.dump({"offset": offset, "tail": _tail_digest(self.path, offset)}, f)
+
+    def rows_since(self, mark):
+        """Rows added after a watermark"""
+        fieldnames = self.fieldnames()
+        with open(self.path, "rb") as raw:
+            raw.seek(mark)
+            with io.TextIOWrapper(raw, encoding="utf-8", newline="") as f:
+                return list(csv.DictReader(f, fieldnames=fieldnames))
+
+    def replace_since(self, mark, rows, fieldnames=None, same_keys=False):
+        """
+        Replace the rows after a watermark with the given rows. The part
+        before the watermark is copied to a temp file that replaces the
+        table, so a crash leaves either the old or the new file, never one
+        with the rows cut off.
+        """
+        rows = list(rows)
+        with self._lock:
+            if self._index is not None:
+                self._index.refresh()
+            fieldnames = fieldnames or self.fieldnames()
+            tmp_path = f"{self.path}.tmp"
+            with open(self.path, "rb") as src, open(tmp_path, "wb") as dst:
+                remaining = mark
+                while remaining > 0:
+                    chunk = src.read(min(remaining, COPY_CHUNK_BYTES))
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+                    remaining -= len(chunk)
+            with open(tmp_path, "a", newline="", encoding="utf-8") as f:
+                csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore").writerows(rows)
+            os.replace(tmp_path, self.path)
+            if self._index is not None:
+                if same_keys:
+                    self._index.add([])
+                else:
+                    self._index.rebuild()
+
+    def export_csv(self, path=None):
+        """CSV copy of the table (the file itself is already one)"""
+        path = path or self.path
+        if os.path.abspath(path) != os.path.abspath(self.path):
+            write_csv(path, self.rows(), self.fieldnames())
+        return path
+
+    def import_csv(self, path=None):
+        """Nothing to import: the CSV is the table"""
+        if path and os.path.abspath(path) != os.path.abspath(self.path):
+            self.rewrite(list(read_csv_rows(path)), read_header(path))
+
+
+class SqliteDatabase:
+    """One SQLite connection shared by every table in the database file"""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS _watermarks (name TEXT PRIMARY KEY, mark INTEGER NOT NULL)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS _imports (name TEXT PRIMARY KEY)")
+        self.conn.commit()
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+class SqliteTable:
+    """
+    A table in the shared SQLite database. Every column is stored as text so
+    rows come back exactly like CSV rows; the key is kept in an indexed
+    _key column. Row order is insertion order (_id).
+    """
+
+    def __init__(self, db, name, columns, key=None, csv_path=None):
+        self.db = db
+        self.name = name
+        self.columns = list(columns)
+        self.key = key
+        self.csv_path = csv_path
+        self._table = _quote(name)
+        self._column_list = ", ".join(_quote(column) for column in self.columns)
+        with db.lock:
+            created = db.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+            ).fetchone() is None
+            column_defs = ", ".join(f"{_quote(column)} TEXT" for column in self.columns)
+            db.conn.execute(f"CREATE TABLE IF NOT EXISTS {self._table} "
+                            f"(_id INTEGER PRIMARY KEY, _key TEXT, {column_defs})")
+            db.conn.execute(f"CREATE INDEX IF NOT EXISTS {_quote('idx_' + name + '_key')} ON {self._table} (_key)")
+            db.conn.commit()
+        if created and csv_path and os.path.exists(csv_path):
+            self.import_csv(csv_path)
+
+    @property
+    def exists(self):
+        """Whether the table holds rows or was imported from a CSV (even an empty one)"""
+        with self.db.lock:
+            if self.db.conn.execute(f"SELECT 1 FROM {self._table} LIMIT 1").fetchone() is not None:
+                return True
+            return self.db.conn.execute(
+                "SELECT 1 FROM _imports WHERE name = ?", (self.name,)
+            ).fetchone() is not None
+
+    def fieldnames(self):
+        return list(self.columns)
+
+    def _key_of(self, row):
+        return "\x1f".join(self.key(row)) if self.key else None
+
+    def _values(self, row):
+        return (self._key_of(row),) + tuple(
+            "" if row.get(column) is None else str(row.get(column)) for column in self.columns
+        )
+
+    def _insert(self, rows):
+        placeholders = ", ".join("?" * (len(self.columns) + 1))
+        self.db.conn.executemany(
+            f"INSERT INTO {self._table} (_key, {self._column_list}) VALUES ({placeholders})",
+            (self._values(row) for row in rows)
+        )
+
+    def rows(self, after=None):
+        """Yield every row (or those inserted after a watermark) as a dict of strings"""
+        where, params = ("WHERE _id > ?", (after,)) if after is not None else ("", ())
+        with self.db.lock:
+            fetched = self.db.conn.execute(
+                f"SELECT {self._column_list} FROM {self._table} {where} ORDER BY _id", params
+            ).fetchall()
+        for values in fetched:
+            yield dict(zip(self.columns, values))
+
+    def append(self, rows):
+        with self.db.lock, self.db.conn:
+            self._insert(rows)
+
+    def rewrite(self, rows, fieldnames=None, same_keys=False):
+        """Replace the whole table in one transaction"""
+        rows = list(rows)
+        with self.db.lock, self.db.conn:
+            self.db.conn.execute(f"DELETE FROM {self._table}")
+            self._insert(rows)
+
+    def has_key(self, row):
+        """Indexed check whether a row with the same key is already stored"""
+        with self.db.lock:
+            return self.db.conn.execute(
+                f"SELECT 1 FROM {self._table} WHERE _key = ? LIMIT 1", (self._key_of(row),)
+            ).fetchone() is not None
+
+    def read_watermark(self):
+        """Last _id recorded by write_watermark, or None if rows before it were removed"""
+        with self.db.lock:
+            mark = self.db.conn.execute("SELECT mark FROM _watermarks WHERE name = ?", (self.name,)).fetchone()
+            last_id = self.db.conn.execute(f"SELECT MAX(_id) FROM {self._table}").fetchone()[0] or 0
+        if mark is None or mark[0] > last_id:
+            return None
+        return mark[0]
+
+    def write_watermark(self):
+        with self.db.lock, self.db.conn:
+            last_id = self.db.conn.execute(f"SELECT MAX(_id) FROM {self._table}").fetchone()[0] or 0
+            self.db.conn.execute(
+                "INSERT OR REPLACE INTO _watermarks (name, mark) VALUES (?, ?)", (self.name, last_id)
+            )
+
+    def rows_since(self, mark):
+        return list(self.rows(after=mark))
+
+    def replace_since(self, mark, rows, fieldnames=None, same_keys=False):
+        rows = list(rows)
+        with self.db.lock, self.db.conn:
+            self.db.conn.execute(f"DELETE FROM {self._table} WHERE _id > ?", (mark,))
+            self._insert(rows)
+
+    def export_csv(self, path=None):
+        """Write the table to its CSV file (or path) for spreadsheets"""
+        path = path or self.csv_path
+        write_csv(path, self.rows(), self.columns)
+        return path
+
+    def import_csv(self, path=None):
+        """Replace the table with the contents of its CSV file (or path)"""
+        path = path or self.csv_path
+        self.rewrite(read_csv_rows(path))
+        if path and os.path.exists(path):
+            with self.db.lock, self.db.conn:
+                self.db.conn.execute("INSERT OR IGNORE INTO _imports (name) VALUES (?)", (self.name,))
+
+
+_tables = {}
+_databases = {}
+_tables_lock = threading.Lock()
+
+
+def get_table(name, backend=None):
+    """Shared table object for a name in TABLES on the configured backend"""
+    backend = backend or STORAGE_BACKEND
+    with _tables_lock:
+        if (backend, name) not in _tables:
+            spec = TABLES[name]
+            if backend == "csv":
+                table = CsvTable(name, spec["file"], spec["columns"], spec.get("key"),
+                                 spec.get("key_sidecar"), spec.get("watermark"))
+            elif backend == "sqlite":
+                if FILES["database"] not in _databases:
+                    _databases[FILES["database"]] = SqliteDatabase(FILES["database"])
+                table = SqliteTable(_databases[FILES["database"]], name, spec["columns"],
+                                    spec.get("key"), spec["file"])
+            else:
+                raise ValueError(f"Unknown storage backend {backend!r} (use 'csv' or 'sqlite')")
+            _tables[(backend, name)] = table
+        return _tables[(backend, name)]
+
+
+def export_parquet(table, path):
+    """Write a table to Parquet for analytics (needs pyarrow)"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export needs pyarrow: pip install pyarrow") from None
+    fieldnames = table.fieldnames()
+    columns = {field: [] for field in fieldnames}
+    for row in table.rows():
+        for field in fieldnames:
+            columns[field].append(row.get(field) or "")
+    pq.write_table(pa.table(columns), path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("action", choices=("export", "import"))
+    parser.add_argument("tables", nargs="*", help=f"default: all of {', '.join(TABLES)}")
+    parser.add_argument("--format", choices=("csv", "parquet"), default="csv")
+    parser.add_argument("--out", help="directory to export to (default: next to the configured CSV files)")
+    args = parser.parse_args()
+
+    for name in args.tables or TABLES:
+        table = get_table(name)
+        csv_path = TABLES[name]["file"]
+        if args.action == "import":
+            table.import_csv(csv_path)
+            print(f"📥 Imported {csv_path} into {name}")
+            continue
+        base = os.path.join(args.out, os.path.basename(csv_path)) if args.out else csv_path
+        if args.out:
+            os.makedirs(args.out, exist_ok=True)
+        if args.format == "parquet":
+            path = export_parquet(table, os.path.splitext(base)[0] + ".parquet")
+        else:
+            path = table.export_csv(base)
+        print(f"📤 Exported {name} to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Benchmark email extraction on saved HTML pages.
+
+Compares the original full BeautifulSoup parse with the streaming,
+byte-capped scanner, reporting throughput and peak memory per fixture.
+Pass --fixtures with a directory of saved .html pages, otherwise a set
+of synthetic shop pages is generated.
+
+run with: python -m shop_finder.benchmarks.bench_email_extractor
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from shop_finder.Scripts.email_extractor import (
+    CHUNK_SIZE, MAX_BYTES, extract_email_full_parse, scan_html_chunks
+)
+
+PRODUCT_CARD = (
+    '<div class="product-card"><img src="/cdn/shop/products/item-{i}.jpg" '
+    'srcset="/cdn/shop/products/item-{i}@2x.jpg 2x" alt="Item {i}">'
+    '<h3 class="title">Hand poured candle no. {i}</h3><span class="price">${price}</span></div>\n'
+)
+
+
+def synthetic_page(size_kb, email_position, seed):
+    """A shop homepage of roughly size_kb with an email in the header, footer, nowhere or entity-encoded"""
+    rng = random.Random(seed)
+    header = '<html><head><title>Moon &amp; Sage</title><script>window.__STATE__ = {"cart": []};</script></head><body>\n'
+    if email_position == "header":
+        header += '<nav><a href="mailto:hello@moonandsage.com">Contact</a></nav>\n'
+    body, i = [], 0
+    while sum(len(part) for part in body) < size_kb * 1024:
+        body.append(PRODUCT_CARD.format(i=i, price=rng.randint(5, 90)))
+        i += 1
+    footer = "<footer>"
+    if email_position == "footer":
+        footer += "<p>Wholesale inquiries: wholesale@moonandsage.com</p>"
+    elif email_position == "encoded":
+        footer += "<p>Email us: orders&#64;moonandsage.com</p>"
+    footer += "</footer></body></html>"
+    return (header + "".join(body) + footer).encode("utf-8")
+
+
+def write_synthetic_fixtures(directory):
+    paths = []
+    for size_kb in (50, 500, 2000):
+        for position in ("header", "footer", "encoded", "none"):
+            path = os.path.join(directory, f"shop_{size_kb}kb_{position}.html")
+            with open(path, "wb") as f:
+                f.write(synthetic_page(size_kb, position, seed=size_kb))
+            paths.append(path)
+    return paths
+
+
+def stream_extract(html, max_bytes, chunk_size):
+    chunks = (html[i:i + chunk_size] for i in range(0, len(html), chunk_size))
+    scan = scan_html_chunks(chunks, max_bytes=max_bytes)
+    return scan.best() or extract_email_full_parse(bytes(scan.raw))
+
+
+def measure(func, repeat):
+    """Best wall time over repeat runs and peak traced memory of one run"""
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return result, best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", help="directory of saved .html pages")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--max-bytes", type=int, default=MAX_BYTES)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.fixtures:
+            paths = sorted(
+                os.path.join(args.fixtures, name) for name in os.listdir(args.fixtures)
+                if name.lower().endswith((".html", ".htm"))
+            )
+        else:
+            paths = write_synthetic_fixtures(tmp)
+
+        print(f"\n📊 Email extraction on {len(paths)} pages")
+        print("=" * 104)
+        print(f"{'fixture':32} {'size':>8} | {'full parse MB/s':>15} {'peak':>9} | {'stream MB/s':>11} {'peak':>9} | email")
+        print("-" * 104)
+        totals = {"legacy": 0.0, "stream": 0.0, "bytes": 0}
+        for path in paths:
+            with open(path, "rb") as f:
+                html = f.read()
+            size_mb = len(html) / (1024 * 1024)
+            legacy_email, legacy_time, legacy_peak = measure(lambda: extract_email_full_parse(html), args.repeat)
+            stream_email, stream_time, stream_peak = measure(
+                lambda: stream_extract(html, args.max_bytes, args.chunk_size), args.repeat
+            )
+            totals["legacy"] += legacy_time
+            totals["stream"] += stream_time
+            totals["bytes"] += len(html)
+            note = stream_email or "-"
+            if stream_email != legacy_email:
+                note += f" (full parse: {legacy_email or '-'})"
+            print(
+                f"{os.path.basename(path)[:32]:32} {len(html) / 1024:7.0f}K | "
+                f"{size_mb / legacy_time:15.1f} {legacy_peak / 1024 / 1024:8.1f}M | "
+                f"{size_mb / stream_time:11.1f} {stream_peak / 1024 / 1024:8.1f}M | {note}"
+            )
+        print("=" * 104)
+        total_mb = totals["bytes"] / (1024 * 1024)
+        print(f"Full parse: {total_mb / totals['legacy']:.1f} MB/s   Streaming: {total_mb / totals['stream']:.1f} MB/s   "
+              f"Speedup: {totals['legacy'] / totals['stream']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
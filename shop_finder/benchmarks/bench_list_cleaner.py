@@ -0,0 +1,190 @@
+"""
+Benchmark process_master_list on synthetic master lists.
+
+With --new-rows the full pass is followed by appending that many unsorted
+rows and timing an incremental pass over just them, which is what a
+search run triggers.
+
+Each size runs in its own process inside a scratch copy of search_logs/,
+so peak memory (max RSS, or the tracemalloc peak where the resource module
+is unavailable) belongs to that run alone. Time is reported per phase
+(load, dedupe, split, save, clean) and every run is appended as one JSON
+line to --output so results can be compared across commits.
+
+run with: python -m shop_finder.benchmarks.bench_list_cleaner --rows 10000 100000
+"""
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from shop_finder.config import STORAGE_BACKEND
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+SEARCH_LOGS = os.path.join(os.path.dirname(BENCHMARKS_DIR), "search_logs")
+DEFAULT_OUTPUT = os.path.join(BENCHMARKS_DIR, "results", "list_cleaner.jsonl")
+
+FIELDNAMES = ["sorted", "query", "city", "location_id", "coordinates", "name", "address", "website", "email", "flagged"]
+QUERIES = ["witch store", "tabletop gaming store", "crystal shop", "metaphysical store", "comic shop"]
+CITIES = ["Austin", "Charlotte", "Denver", "Portland", "Atlanta", "Seattle", "Chicago", "Phoenix"]
+LOCAL_PARTS = ["hello", "orders", "shop", "jane", "info", "support", "wholesale", "contact", "owner"]
+
+
+def write_master_list(path, rows, duplicate_ratio, email_ratio, seed, first_id=0):
+    """Unsorted synthetic master_list.csv; duplicates repeat an earlier store with case/spacing noise"""
+    rng = random.Random(seed)
+    stores = []
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        for i in range(first_id, first_id + rows):
+            if stores and rng.random() < duplicate_ratio:
+                name, address, city = rng.choice(stores)
+                if rng.random() < 0.5:
+                    name, address = f" {name.upper()}", f"{address.lower()} "
+            else:
+                city = rng.choice(CITIES)
+                name = f"Shop {i}"
+                address = f"{rng.randint(1, 9999)} Main St, {city}"
+                stores.append((name, address, city))
+            email = ""
+            if rng.random() < email_ratio:
+                domain = f"shop{i}.com"
+                email = f"{rng.choice(LOCAL_PARTS)}@{domain}"
+                if rng.random() < 0.2:
+                    email = f"Email: {email}, sales@{domain}"
+            lat, lng = rng.uniform(25, 49), rng.uniform(-125, -66)
+            writer.writerow({
+                "sorted": "false", "query": rng.choice(QUERIES), "city": city,
+                "location_id": f"{city}_{lat:.2f}_{lng:.2f}", "coordinates": f"{lat},{lng}",
+                "name": name, "address": address, "website": f"https://shop{i}.com", "email": email,
+                "flagged": ""
+            })
+
+
+def run_size(rows, duplicate_ratio, email_ratio, seed, new_rows=0):
+    """Generate one master list and process it; runs in a fresh child process"""
+    scratch = tempfile.mkdtemp(prefix="shop_finder_bench_")
+    cwd = os.getcwd()
+    try:
+        logs = os.path.join(scratch, "shop_finder", "search_logs")
+        os.makedirs(logs)
+        os.makedirs(os.path.join(scratch, "fenclaw_search"))
+        shutil.copy(os.path.join(SEARCH_LOGS, "excluded_retailers.csv"), logs)
+        start = time.perf_counter()
+        write_master_list(os.path.join(logs, "master_list.csv"), rows, duplicate_ratio, email_ratio, seed)
+        generate_seconds = time.perf_counter() - start
+
+        os.chdir(scratch)  # listCleaner paths are relative
+        from shop_finder.Scripts.listCleaner import process_master_list
+        from shop_finder.Scripts.storage import get_table
+
+        if resource is None:
+            import tracemalloc
+            tracemalloc.start()
+        timings = {}
+        with contextlib.redirect_stdout(io.StringIO()):
+            process_master_list(timings)
+            if new_rows:
+                # Append through the master list table the way save_to_csv does
+                new_file = os.path.join(scratch, "new_rows.csv")
+                write_master_list(new_file, new_rows, duplicate_ratio, email_ratio, seed + 1, first_id=rows)
+                with open(new_file, newline="", encoding="utf-8") as f:
+                    get_table("master_list").append(csv.DictReader(f))
+                timings = {}
+                process_master_list(timings, incremental=True)
+        if resource is None:
+            peak_mb = tracemalloc.get_traced_memory()[1] / 2 ** 20
+            memory = "tracemalloc"
+        else:
+            peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+            if sys.platform == "darwin":
+                peak_mb /= 1024  # bytes on macOS
+            memory = "max_rss"
+        return {"timings": timings, "peak_mb": peak_mb, "memory": memory, "generate_seconds": generate_seconds}
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=BENCHMARKS_DIR, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000],
+                        help="master list sizes to run, e.g. 10000 100000 1000000")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.2)
+    parser.add_argument("--email-ratio", type=float, default=0.4)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--new-rows", type=int, default=0,
+                        help="time an incremental pass over this many rows appended after the full pass")
+    parser.add_argument("--label", default="", help="free-form note stored with the results")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    commit = git_commit()
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    phases = ("load", "dedupe", "split", "save", "clean")
+
+    mode = f"incremental (+{args.new_rows} rows)" if args.new_rows else "full"
+    print(f"\n📊 process_master_list {mode}, {args.duplicate_ratio:.0%} duplicates, "
+          f"{args.email_ratio:.0%} with email, {STORAGE_BACKEND} storage")
+    print("=" * 78)
+    print(f"{'rows':>9} " + " ".join(f"{phase:>8}" for phase in phases) + f" {'total s':>8} {'peak MB':>8}")
+    for rows in args.rows:
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            result = pool.submit(
+                run_size, rows, args.duplicate_ratio, args.email_ratio, args.seed, args.new_rows
+            ).result()
+        timings = result["timings"]
+        total = sum(timings.values())
+        print(f"{rows:9} " + " ".join(f"{timings.get(phase, 0):8.2f}" for phase in phases) +
+              f" {total:8.2f} {result['peak_mb']:8.1f}")
+
+        record = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": commit,
+            "label": args.label,
+            "python": platform.python_version(),
+            "rows": rows,
+            "duplicate_ratio": args.duplicate_ratio,
+            "email_ratio": args.email_ratio,
+            "seed": args.seed,
+            "new_rows": args.new_rows,
+            "storage": STORAGE_BACKEND,
+            "phases": timings,
+            "total_seconds": total,
+            "peak_mb": result["peak_mb"],
+            "memory": result["memory"],
+        }
+        with open(args.output, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    print("=" * 78)
+    print(f"Results appended to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Run the search pipeline end to end against the local mock Places API.
+
+Starts shop_finder.benchmarks.mock_places on a free port, points
+shopFinder at it and runs one search (run_search, or find_optimal_radius
+with --mode radius) per synthetic city inside a scratch copy of
+search_logs/, so no real key, billing or project files are touched.
+Reports wall time per city and searches/sec, details/sec overall.
+
+All farm websites share one host, so the per-host scrape limit is raised
+to the in-flight limit to keep it from serializing every scrape.
+
+run with: python -m shop_finder.benchmarks.bench_places_pipeline
+"""
+import argparse
+import contextlib
+import importlib
+import io
+import os
+import shutil
+import tempfile
+import time
+
+from shop_finder.benchmarks.mock_places import MockPlacesServer, SyntheticWorld
+
+SEARCH_LOGS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "search_logs")
+
+
+def make_scratch_dir():
+    """Temp dir holding header-only copies of the search_logs CSVs"""
+    scratch = tempfile.mkdtemp(prefix="shop_finder_bench_")
+    logs = os.path.join(scratch, "shop_finder", "search_logs")
+    os.makedirs(logs)
+    for name in os.listdir(SEARCH_LOGS):
+        if name.endswith(".csv"):
+            with open(os.path.join(SEARCH_LOGS, name), encoding="utf-8") as src:
+                header = src.readline()
+            with open(os.path.join(logs, name), "w", encoding="utf-8") as dst:
+                dst.write(header)
+    return scratch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cities", type=int, default=3)
+    parser.add_argument("--stores-per-city", type=int, default=300)
+    parser.add_argument("--query", default="witch store")
+    parser.add_argument("--radius", type=int, default=25000)
+    parser.add_argument("--mode", choices=("search", "radius"), default="search")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--token-delay", type=float, default=2.0,
+                        help="seconds before a next_page_token is accepted (Google needs ~2)")
+    parser.add_argument("--no-rate-limit", action="store_true", help="lift the text search / details token buckets")
+    parser.add_argument("--verbose", action="store_true", help="show shopFinder's own output")
+    args = parser.parse_args()
+
+    world = SyntheticWorld(args.seed, args.cities, args.stores_per_city)
+    server = MockPlacesServer(
+        world, latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000, error_rate=args.error_rate,
+        drop_rate=args.drop_rate, token_delay=args.token_delay, seed=args.seed
+    ).start()
+    os.environ["SHOP_FINDER_PLACES_URL"] = server.places_url
+    os.environ["SHOP_FINDER_DETAILS_URL"] = server.details_url
+    os.environ.setdefault("GOOGLE_PLACES_API_KEY", "mock")
+
+    scratch = make_scratch_dir()
+    cwd = os.getcwd()
+    os.chdir(scratch)  # FILES paths are relative, so every cache and CSV lands in the scratch copy
+    try:
+        rate_limiter = importlib.import_module("shop_finder.Scripts.rate_limiter")
+        rate_limiter.PAGE_TOKEN_MIN_DELAY = args.token_delay
+        if args.no_rate_limit:
+            rate_limiter.configure_limits({name: (1e6, 1e6) for name in rate_limiter.RATE_LIMITS})
+        shop_finder = importlib.import_module("shop_finder.shopFinder")
+        shop_finder.SCRAPE_MAX_PER_HOST = shop_finder.SCRAPE_MAX_IN_FLIGHT
+
+        print(f"\n🧪 {len(world.stores)} mock stores, seed {args.seed}, {args.latency_ms:.0f}ms latency, mode {args.mode}")
+        print("=" * 72)
+        print(f"{'city':10} {'results':>8} {'searches':>9} {'details':>8} {'pages':>6} {'wall s':>8}")
+        totals = {"text_search": 0, "details": 0, "wall": 0.0}
+        for city, lat, lng in world.cities:
+            before = dict(server.stats)
+            location = f"{lat},{lng}"
+            output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+            start = time.perf_counter()
+            with output:
+                if args.mode == "search":
+                    results = shop_finder.run_search(args.query, location, city, args.radius)[0]
+                else:
+                    results = shop_finder.find_optimal_radius(args.query, location, city)[1]
+            wall = time.perf_counter() - start
+            delta = {key: server.stats[key] - before.get(key, 0) for key in ("text_search", "details", "site_pages")}
+            totals["text_search"] += delta["text_search"]
+            totals["details"] += delta["details"]
+            totals["wall"] += wall
+            print(f"{city:10} {results:8} {delta['text_search']:9} {delta['details']:8} "
+                  f"{delta['site_pages']:6} {wall:8.2f}")
+        shop_finder.flush_quota_ledger()
+        shop_finder.flush_search_config()
+
+        wall = totals["wall"] or 1e-9
+        print("-" * 72)
+        print(f"Searches/sec: {totals['text_search'] / wall:.2f}   Details/sec: {totals['details'] / wall:.2f}   "
+              f"Wall: {totals['wall']:.2f}s")
+        print(f"Injected errors: {server.stats['errors']}   Dropped: {server.stats['dropped']}   "
+              f"Early page tokens: {server.stats['early_tokens']}")
+        print("=" * 72)
+    finally:
+        os.chdir(cwd)
+        server.stop()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Replay search history to see how many probe calls the radius predictor saves.
+
+Every saved optimal radius is replayed leave-one-out: the predictor is
+asked for a radius without that row, then both the plain 1 km - 50 km
+binary search and the predicted-bracket search are simulated against
+that row's density. Each probe is one billed Places text search.
+
+run with: python -m shop_finder.benchmarks.bench_radius_predictor
+"""
+import argparse
+
+from shop_finder.config import FILES
+from shop_finder.Scripts.radius_predictor import BANDWIDTH_KM, RadiusPredictor, replay_history
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--optimal-radii", default=FILES["optimal_radii"])
+    parser.add_argument("--search-log", default=FILES["search_log"])
+    parser.add_argument("--bandwidth-km", type=float, default=BANDWIDTH_KM)
+    parser.add_argument("--cost-per-search", type=float, default=0.017)
+    args = parser.parse_args()
+
+    predictor = RadiusPredictor.from_history(args.optimal_radii, args.search_log)
+    predictor.bandwidth_km = args.bandwidth_km
+    report = replay_history(predictor)
+
+    searches = report["searches"] or 1
+    print(f"\n📊 Replayed {report['searches']} searches ({report['predicted']} had nearby history)")
+    print("=" * 60)
+    print(f"Plain binary search:  {report['plain_probes']:6} calls ({report['plain_probes'] / searches:.1f} per search)")
+    print(f"Predicted bracket:    {report['predicted_probes']:6} calls ({report['predicted_probes'] / searches:.1f} per search)")
+    print(f"Calls saved:          {report['calls_saved']:6} (${report['calls_saved'] * args.cost_per_search:.2f})")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark planning time against a large search_log.csv.
+
+Compares the old per-call CSV rescan in has_already_searched with the
+SearchLogIndex that is loaded once per run.
+
+run with: python -m shop_finder.benchmarks.bench_search_log
+"""
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+
+from shop_finder.Scripts.search_log_index import SearchLogIndex
+
+QUERIES = ["witch store", "tabletop gaming store", "crystal shop", "metaphysical store", "comic shop"]
+CITIES = ["Austin", "Charlotte", "Denver", "Portland", "Atlanta", "Seattle", "Chicago", "Phoenix"]
+RADII = [50000, 25000, 13000, 6000, 3000, 1500]
+
+
+def write_search_log(path, rows, seed=42):
+    """Write a synthetic search_log.csv and return the logged searches"""
+    rng = random.Random(seed)
+    logged = []
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["query", "city", "lat", "lng", "radius_m", "date"])
+        writer.writeheader()
+        for _ in range(rows):
+            entry = (
+                rng.choice(QUERIES),
+                rng.choice(CITIES),
+                round(rng.uniform(25.0, 49.0), 6),
+                round(rng.uniform(-125.0, -66.0), 6),
+                rng.choice(RADII),
+            )
+            logged.append(entry)
+            writer.writerow({
+                "query": entry[0], "city": entry[1], "lat": entry[2],
+                "lng": entry[3], "radius_m": entry[4], "date": "2025-01-01"
+            })
+    return logged
+
+
+def make_configs(logged, count, seed=7):
+    """Half of the planned searches were already logged, half are new"""
+    rng = random.Random(seed)
+    configs = [rng.choice(logged) for _ in range(count // 2)]
+    while len(configs) < count:
+        configs.append((
+            rng.choice(QUERIES), rng.choice(CITIES),
+            round(rng.uniform(25.0, 49.0), 6), round(rng.uniform(-125.0, -66.0), 6),
+            rng.choice(RADII),
+        ))
+    rng.shuffle(configs)
+    return configs
+
+
+def legacy_has_already_searched(log_file, query, city, lat, lng, radius):
+    """The original implementation: rescan the whole CSV on every call"""
+    with open(log_file, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            if (
+                row["query"] == query and
+                row["city"] == city and
+                abs(float(row["lat"]) - float(lat)) < 0.0001 and
+                abs(float(row["lng"]) - float(lng)) < 0.0001 and
+                int(row["radius_m"]) == radius
+            ):
+                return True
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000, help="search_log.csv rows to generate")
+    parser.add_argument("--configs", type=int, default=2000, help="planned searches to check")
+    parser.add_argument("--legacy-sample", type=int, default=25,
+                        help="configs to time with the legacy scan (extrapolated to --configs)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log_file = os.path.join(tmp, "search_log.csv")
+        logged = write_search_log(log_file, args.rows)
+        configs = make_configs(logged, args.configs)
+
+        start = time.perf_counter()
+        sample = configs[:args.legacy_sample]
+        legacy_hits = sum(legacy_has_already_searched(log_file, *c) for c in sample)
+        legacy_sample_time = time.perf_counter() - start
+        legacy_time = legacy_sample_time * len(configs) / max(len(sample), 1)
+
+        start = time.perf_counter()
+        index = SearchLogIndex.from_csv(log_file)
+        load_time = time.perf_counter() - start
+        start = time.perf_counter()
+        hits = sum(index.contains(*c) for c in configs)
+        lookup_time = time.perf_counter() - start
+
+        index_sample_hits = sum(index.contains(*c) for c in sample)
+        assert index_sample_hits == legacy_hits, "index disagrees with the legacy scan"
+
+    print(f"\n📊 Planning {len(configs):,} searches against {args.rows:,} logged rows")
+    print("=" * 60)
+    print(f"Legacy rescan:  {legacy_time:10.3f}s (extrapolated from {len(sample)} configs)")
+    print(f"Index load:     {load_time:10.3f}s")
+    print(f"Index lookups:  {lookup_time:10.3f}s ({hits:,} already searched)")
+    print(f"Speedup:        {legacy_time / (load_time + lookup_time):10.1f}x")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Compare search_map.html built one circle per search ("circles", the old
+output) with the aggregated GeoJSON map ("aggregate") on synthetic search
+logs.
+
+Reports build time, file size and the number of Leaflet layers drawn at
+the opening zoom. With playwright installed (pip install playwright &&
+playwright install chromium) it also loads each map in headless Chromium
+and reports the time until the first frame after load.
+
+run with: python -m shop_finder.benchmarks.bench_search_map --rows 1000 10000 50000
+"""
+import argparse
+import contextlib
+import csv
+import io
+import math
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from shop_finder.Scripts.map_search_log import DENSITY_LEVELS, MAP_ZOOM, generate_search_map
+from shop_finder.Scripts.storage import SEARCH_LOG_FIELDS
+
+try:
+    from playwright.sync_api import sync_playwright
+except ImportError:
+    sync_playwright = None
+
+QUERIES = ["witch store", "tabletop gaming store", "crystal shop", "metaphysical store"]
+RADII = [50000, 25000, 12500, 6000, 3000]
+
+# Resolves once the page has loaded and painted twice, with the time since navigation start
+FIRST_FRAME_JS = """() => new Promise(resolve => {
+    const done = () => requestAnimationFrame(() => requestAnimationFrame(() => resolve(performance.now())));
+    if (document.readyState === "complete") { done(); } else { window.addEventListener("load", done); }
+})"""
+
+
+def write_search_log(path, rows, seed):
+    """Searches clustered around random US cities, like a subdivided sweep"""
+    rng = random.Random(seed)
+    cities = [(f"City{i}", rng.uniform(26, 48), rng.uniform(-122, -70)) for i in range(max(1, rows // 200))]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=SEARCH_LOG_FIELDS)
+        writer.writeheader()
+        for _ in range(rows):
+            city, lat, lng = rng.choice(cities)
+            radius = rng.choice(RADII)
+            writer.writerow({
+                "query": rng.choice(QUERIES), "city": city,
+                "lat": lat + rng.gauss(0, 0.5), "lng": lng + rng.gauss(0, 0.5) / math.cos(math.radians(lat)),
+                "radius_m": radius, "date": "2025-01-01", "results": rng.randint(0, 60)
+            })
+
+
+def opening_layers(path, mode):
+    """Shapes Leaflet draws at MAP_ZOOM: every circle, or the density cells of the opening level"""
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    if mode == "circles":
+        return len(rows)
+    cell_deg = [deg for min_zoom, deg in DENSITY_LEVELS if min_zoom <= MAP_ZOOM][-1]
+    return len({
+        (row["query"], math.floor(float(row["lat"]) / cell_deg), math.floor(float(row["lng"]) / cell_deg))
+        for row in rows
+    })
+
+
+def first_frame_ms(browser, path):
+    page = browser.new_page()
+    try:
+        page.goto(f"file://{os.path.abspath(path)}", timeout=600000)
+        return page.evaluate(FIRST_FRAME_JS)
+    finally:
+        page.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-browser", action="store_true", help="skip the headless Chromium render timing")
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="shop_finder_bench_")
+    browser_context = contextlib.nullcontext(None)
+    if sync_playwright is not None and not args.no_browser:
+        browser_context = sync_playwright()
+    try:
+        with browser_context as playwright:
+            browser = playwright.chromium.launch() if playwright else None
+            print(f"\n🗺️ search_map.html, circles vs aggregate{'' if browser else ' (no playwright: render time n/a)'}")
+            print("=" * 74)
+            print(f"{'rows':>7} {'mode':10} {'build s':>8} {'size MB':>8} {'layers':>8} {'render ms':>10}")
+            for rows in args.rows:
+                log_file = os.path.join(scratch, f"search_log_{rows}.csv")
+                write_search_log(log_file, rows, args.seed)
+                for mode in ("circles", "aggregate"):
+                    output = os.path.join(scratch, f"map_{rows}_{mode}.html")
+                    start = time.perf_counter()
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        generate_search_map(log_file, output, mode)
+                    build = time.perf_counter() - start
+                    render = f"{first_frame_ms(browser, output):10.0f}" if browser else f"{'n/a':>10}"
+                    print(f"{rows:7} {mode:10} {build:8.2f} {os.path.getsize(output) / 2 ** 20:8.2f} "
+                          f"{opening_layers(log_file, mode):8} {render}")
+            if browser:
+                browser.close()
+        print("=" * 74)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+Local stand-in for the Places Text Search and Details endpoints, plus a
+farm of shop websites for the email scraper.
+
+Stores are generated from a seed around a handful of synthetic cities.
+Text Search returns the stores inside the requested circle nearest first,
+20 per page and at most 60, with a next_page_token that (like Google's)
+is rejected with INVALID_REQUEST until token_delay seconds have passed.
+Latency, API errors and dropped connections can be injected.
+
+Serve it on its own and point shopFinder at it:
+
+    python -m shop_finder.benchmarks.mock_places --port 8765
+    SHOP_FINDER_PLACES_URL=http://127.0.0.1:8765/maps/api/place/textsearch/json \\
+    SHOP_FINDER_DETAILS_URL=http://127.0.0.1:8765/maps/api/place/details/json \\
+    GOOGLE_PLACES_API_KEY=mock python -m shop_finder.shopFinder
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+TEXT_SEARCH_PATH = "/maps/api/place/textsearch/json"
+DETAILS_PATH = "/maps/api/place/details/json"
+SITE_PREFIX = "/site/"
+
+PAGE_SIZE = 20
+MAX_RESULTS = 60
+
+# Share of websites by where (if anywhere) the email lives
+SITE_KINDS = (("homepage", 0.5), ("contact", 0.25), ("none", 0.15), ("missing", 0.1))
+
+STREETS = ("Main St", "Oak Ave", "Elm St", "Market St", "2nd Ave", "Broadway", "Pine St", "Cedar Rd")
+WORDS = ("Moon", "Crystal", "Raven", "Sage", "Dragon", "Willow", "Star", "Tarot", "Dice", "Comet")
+KINDS = ("Shop", "Emporium", "Games", "Curiosities", "Goods", "Books", "Apothecary")
+
+
+class SyntheticWorld:
+    """Seeded stores scattered around synthetic city centers"""
+
+    def __init__(self, seed=42, cities=5, stores_per_city=400, spread_km=15.0, website_ratio=0.8):
+        rng = random.Random(seed)
+        self.cities = []
+        self.stores = []
+        for c in range(cities):
+            city = f"City{c + 1}"
+            lat = round(rng.uniform(30.0, 45.0), 4)
+            lng = round(rng.uniform(-120.0, -75.0), 4)
+            self.cities.append((city, lat, lng))
+            lng_km = 111.32 * math.cos(math.radians(lat))
+            for _ in range(stores_per_city):
+                i = len(self.stores)
+                kind = rng.choices([k for k, _ in SITE_KINDS], [w for _, w in SITE_KINDS])[0]
+                self.stores.append({
+                    "id": i,
+                    "place_id": f"mock_{seed}_{i}",
+                    "name": f"{rng.choice(WORDS)} {rng.choice(WORDS)} {rng.choice(KINDS)} {i}",
+                    "address": f"{rng.randint(1, 9999)} {rng.choice(STREETS)}, {city}",
+                    "lat": lat + rng.gauss(0, spread_km) / 111.32,
+                    "lng": lng + rng.gauss(0, spread_km) / lng_km,
+                    "has_website": rng.random() < website_ratio,
+                    "site_kind": kind,
+                    "padding": rng.randint(20, 120) * 1024,
+                })
+        self.by_place_id = {store["place_id"]: store for store in self.stores}
+
+    def search(self, lat, lng, radius_m):
+        """Stores inside the circle, nearest first, capped at MAX_RESULTS"""
+        lng_scale = math.cos(math.radians(lat))
+        hits = []
+        for store in self.stores:
+            d_lat = (store["lat"] - lat) * 111320.0
+            d_lng = (store["lng"] - lng) * 111320.0 * lng_scale
+            distance = math.hypot(d_lat, d_lng)
+            if distance <= radius_m:
+                hits.append((distance, store["id"]))
+        hits.sort()
+        return [self.stores[i] for _, i in hits[:MAX_RESULTS]]
+
+
+def render_site(store, page):
+    """HTML for one farm page, or None if the page does not exist"""
+    kind = store["site_kind"]
+    if kind == "missing":
+        return None
+    email = f"hello@shop{store['id']}.example"
+    filler = "<p>" + ("Handmade goods and local favourites. " * 40) + "</p>\n"
+    body = filler * max(1, store["padding"] // len(filler))
+    if page == "":
+        nav = f'<a href="{SITE_PREFIX}{store["id"]}/contact">Contact us</a>'
+        mail = f'<a href="mailto:{email}">{email}</a>' if kind == "homepage" else ""
+        return f"<html><head><title>{store['name']}</title></head><body>{nav}{body}{mail}</body></html>"
+    if page == "contact":
+        mail = f"<p>Write to {email}</p>" if kind == "contact" else "<p>Use the form below.</p>"
+        return f"<html><body><h1>Contact</h1>{mail}{filler}</body></html>"
+    return None
+
+
+class MockPlacesServer:
+    """ThreadingHTTPServer serving the mock endpoints on a background thread"""
+
+    def __init__(self, world, host="127.0.0.1", port=0, latency=0.0, jitter=0.0,
+                 error_rate=0.0, drop_rate=0.0, token_delay=0.0, seed=0):
+        self.world = world
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.token_delay = token_delay
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens = {}
+        self._token_count = 0
+        self.stats = defaultdict(int)
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def places_url(self):
+        return self.base_url + TEXT_SEARCH_PATH
+
+    @property
+    def details_url(self):
+        return self.base_url + DETAILS_PATH
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _roll(self):
+        """Latency to inject and whether to fail this API call ('error', 'drop' or None)"""
+        with self._lock:
+            delay = self.latency + (self._rng.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+            roll = self._rng.random()
+        if roll < self.drop_rate:
+            return max(delay, 0.0), "drop"
+        if roll < self.drop_rate + self.error_rate:
+            return max(delay, 0.0), "error"
+        return max(delay, 0.0), None
+
+    def _issue_token(self, results, offset):
+        with self._lock:
+            self._token_count += 1
+            token = f"tok{self._token_count}"
+            self._tokens[token] = (results, offset, time.monotonic())
+        return token
+
+    def text_search(self, params):
+        token = params.get("pagetoken")
+        if token:
+            with self._lock:
+                entry = self._tokens.get(token)
+            if entry is None:
+                return {"status": "INVALID_REQUEST", "results": []}
+            results, offset, issued_at = entry
+            if time.monotonic() - issued_at < self.token_delay:
+                self.stats["early_tokens"] += 1
+                return {"status": "INVALID_REQUEST", "results": []}
+        else:
+            try:
+                lat, lng = map(float, params["location"].split(","))
+                radius = float(params.get("radius", 50000))
+            except (KeyError, ValueError):
+                return {"status": "INVALID_REQUEST", "results": []}
+            results, offset = self.world.search(lat, lng, radius), 0
+            if not results:
+                return {"status": "ZERO_RESULTS", "results": []}
+
+        page = results[offset:offset + PAGE_SIZE]
+        data = {
+            "status": "OK",
+            "results": [{
+                "place_id": store["place_id"],
+                "name": store["name"],
+                "formatted_address": store["address"],
+                "geometry": {"location": {"lat": store["lat"], "lng": store["lng"]}}
+            } for store in page]
+        }
+        if offset + PAGE_SIZE < len(results):
+            data["next_page_token"] = self._issue_token(results, offset + PAGE_SIZE)
+        return data
+
+    def details(self, params):
+        store = self.world.by_place_id.get(params.get("place_id", ""))
+        if store is None:
+            return {"status": "NOT_FOUND"}
+        result = {}
+        if store["has_website"]:
+            result["website"] = f"{self.base_url}{SITE_PREFIX}{store['id']}/"
+        return {"status": "OK", "result": result}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body, content_type, headers=()):
+                payload = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _api(self, endpoint, handler, params):
+                delay, failure = server._roll()
+                if delay:
+                    time.sleep(delay)
+                with server._lock:
+                    server.stats[endpoint] += 1
+                if failure == "drop":
+                    with server._lock:
+                        server.stats["dropped"] += 1
+                    self.close_connection = True
+                    self.connection.close()
+                    return
+                if failure == "error":
+                    with server._lock:
+                        server.stats["errors"] += 1
+                    data = {"status": "UNKNOWN_ERROR", "error_message": "Injected error"}
+                else:
+                    data = handler(params)
+                self._send(200, json.dumps(data), "application/json")
+
+            def _site(self, path):
+                store_id, _, page = path[len(SITE_PREFIX):].partition("/")
+                store = server.world.stores[int(store_id)] if store_id.isdigit() and int(store_id) < len(server.world.stores) else None
+                html = render_site(store, page.strip("/")) if store else None
+                with server._lock:
+                    server.stats["site_pages"] += 1
+                if html is None:
+                    self._send(404, "<html><body>Not found</body></html>", "text/html")
+                    return
+                etag = f'"site-{store["id"]}-{page.strip("/") or "home"}"'
+                if self.headers.get("If-None-Match") == etag:
+                    with server._lock:
+                        server.stats["not_modified"] += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self._send(200, html, "text/html; charset=utf-8", [("ETag", etag)])
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                if url.path == TEXT_SEARCH_PATH:
+                    self._api("text_search", server.text_search, params)
+                elif url.path == DETAILS_PATH:
+                    self._api("details", server.details, params)
+                elif url.path.startswith(SITE_PREFIX):
+                    self._site(url.path)
+                else:
+                    self._send(404, "Not found", "text/plain")
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cities", type=int, default=5)
+    parser.add_argument("--stores-per-city", type=int, default=400)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--token-delay", type=float, default=2.0)
+    args = parser.parse_args()
+
+    world = SyntheticWorld(args.seed, args.cities, args.stores_per_city)
+    server = MockPlacesServer(
+        world, port=args.port, latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate, drop_rate=args.drop_rate, token_delay=args.token_delay, seed=args.seed
+    )
+    print(f"🧪 Mock Places API on {server.base_url} with {len(world.stores)} stores")
+    for city, lat, lng in world.cities:
+        print(f"   {city},{lat},{lng}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,23 @@
+import os
+
 # File Configuration
 FILES = {
     "search_log": "shop_finder/search_logs/search_log.csv",
     "usage_counter": "shop_finder/search_logs/usage_counter.txt",
+    "usage_ledger": "shop_finder/search_logs/usage_ledger.json",
     "master_list": "shop_finder/search_logs/master_list.csv",
+    "master_list_index": "shop_finder/search_logs/master_list.keys",
+    "master_list_offset": "shop_finder/search_logs/master_list.offset",
     "with_emails": "shop_finder/search_logs/stores_with_emails.csv",
     "without_emails": "shop_finder/search_logs/stores_without_email.csv",
     "excluded_retailers": "shop_finder/search_logs/excluded_retailers.csv",
     "search_config" : "shop_finder/search_logs/search_config.csv",
-    "optimal_radii" : "shop_finder/search_logs/optimal_radii.csv"
+    "optimal_radii" : "shop_finder/search_logs/optimal_radii.csv",
+    "details_cache": "shop_finder/search_logs/details_cache.sqlite",
+    "scrape_cache": "shop_finder/search_logs/scrape_cache.sqlite",
+    "database": "shop_finder/search_logs/shop_finder.sqlite"
 } 
+
+# Where search logs, config and store lists live: "csv" (the files above) or
+# "sqlite" (FILES["database"], imported from the CSVs on first use)
+STORAGE_BACKEND = os.getenv("SHOP_FINDER_STORAGE", "csv")
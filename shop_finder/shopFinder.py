@@ -1,13 +1,34 @@
 import requests
 import csv
 import os
-import re
-from bs4 import BeautifulSoup
 import time
+import argparse
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from shop_finder.Scripts.listCleaner import process_master_list
 from shop_finder.Scripts.map_search_log import generate_search_map
 from shop_finder.config import FILES
-from shop_finder.Scripts.search_subdivider import get_subdivision_centers, should_subdivide
+from shop_finder.Scripts.search_subdivider import (
+    SATURATED_RESULTS, get_density_subdivision_centers, get_subdivision_centers, should_subdivide
+)
+from shop_finder.Scripts.search_log_index import SearchLogIndex
+from shop_finder.Scripts.scrape_stage import scrape_places
+from shop_finder.Scripts.http_client import http_get
+from shop_finder.Scripts.search_config_store import SearchConfigStore
+from shop_finder.Scripts.storage import get_table
+from shop_finder.Scripts.retailer_filter import load_exclusion_matcher
+from shop_finder.Scripts.details_cache import DetailsCache
+from shop_finder.Scripts.quota_ledger import QuotaLedger
+from shop_finder.Scripts.coverage_index import CoverageIndex
+from shop_finder.Scripts.radius_predictor import RadiusPredictor, binary_search_radius, predicted_search_radius
+from shop_finder.Scripts.scrape_cache import ScrapeCache
+from shop_finder.Scripts.email_extractor import email_from_scan, scan_response
+from shop_finder.Scripts.contact_crawler import crawl_contact_pages, crawl_stats
+from shop_finder.Scripts.rate_limiter import (
+    PageTokenGate, PAGE_TOKEN_MAX_RETRIES, PAGE_TOKEN_RETRY_DELAY,
+    get_limiter, get_throttle_stats, get_throttled_time, network_backoff, throttled_sleep
+)
 
 # ----------------------
 # CONFIGURATION
@@ -15,9 +36,12 @@ from shop_finder.Scripts.search_subdivider import get_subdivision_centers, shoul
 API_KEY = os.getenv("GOOGLE_PLACES_API_KEY")
 
 SEARCH_LOG_FILE = FILES["search_log"]
-PLACES_URL = "https://maps.googleapis.com/maps/api/place/textsearch/json"
-DETAILS_URL = "https://maps.googleapis.com/maps/api/place/details/json"
+# Point these at a local mock (shop_finder.benchmarks.mock_places) to run without billing
+PLACES_URL = os.getenv("SHOP_FINDER_PLACES_URL", "https://maps.googleapis.com/maps/api/place/textsearch/json")
+DETAILS_URL = os.getenv("SHOP_FINDER_DETAILS_URL", "https://maps.googleapis.com/maps/api/place/details/json")
 MAX_MONTHLY_QUOTA = 10588
+# Calls held against the quota while one search config runs: 3 result pages plus a Details call per result
+CONFIG_CALL_BUDGET = 3 + SATURATED_RESULTS
 COUNTER_FILE = FILES["usage_counter"]
 OUTPUT_CSV = FILES["master_list"]
 SEARCH_CONFIG_FILE = FILES["search_config"]
@@ -27,76 +51,157 @@ OPTIMAL_RADII_FILE = FILES["optimal_radii"]
 COST_PER_SEARCH = 0.017  # $0.017 per search
 COST_PER_DETAILS = 0.017  # $0.017 per place details
 
+# Concurrent website scraping
+SCRAPE_MAX_IN_FLIGHT = 8  # Details lookups + scrapes running at once
+SCRAPE_MAX_PER_HOST = 2  # Simultaneous requests to any one shop website
+SCRAPE_MAX_BYTES = 512 * 1024  # Stop reading a homepage after this much HTML
+CONTACT_PAGE_BUDGET = 3  # Contact/about/wholesale pages tried when the homepage has no email
+CONTACT_BYTE_BUDGET = 768 * 1024  # HTML read across those pages, per site
+
+# Subdivision: "density" only places child circles over sectors that returned stores,
+# "fixed" always uses the full ring from SUBDIVISION_RULES
+SUBDIVISION_MODE = "density"
+SUBDIVISION_MIN_RESULTS = 1  # Stores a sector needs to get its own child circle
+
+# Child circles at least this much covered by earlier unsaturated searches are dropped;
+# partly covered ones shrink to the smallest standard radius that reaches the gap
+COVERAGE_DROP_THRESHOLD = 0.9
+COVERAGE_SHRINK = True
+
+# Place Details cache (keyed by place_id, shared across runs and queries)
+DETAILS_CACHE_TTL_DAYS = 90
+DETAILS_CACHE_MEMORY_SIZE = 5000
+details_cache = DetailsCache(FILES["details_cache"], DETAILS_CACHE_TTL_DAYS, DETAILS_CACHE_MEMORY_SIZE)
+
+# Website scrape cache (keyed by normalized URL, revalidated with conditional GETs)
+SCRAPE_CACHE_TTL_DAYS = 30
+SCRAPE_CACHE_MAX_ENTRIES = 50000
+scrape_cache = ScrapeCache(FILES["scrape_cache"], SCRAPE_CACHE_TTL_DAYS, SCRAPE_CACHE_MAX_ENTRIES)
+
+
+# Serializes CSV/config writes and shared index updates when searches run in parallel
+_io_lock = threading.RLock()
+
+def serialized(func):
+    """Run func while holding the shared file lock"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with _io_lock:
+            return func(*args, **kwargs)
+    return wrapper
+
+# Loaded once per run on first use; changes are written back by flush_search_config
+_search_config_store = None
+
+@serialized
+def get_search_config_store():
+    """Return the in-memory search config store, loading the search config on first use"""
+    global _search_config_store
+    if _search_config_store is None:
+        _search_config_store = SearchConfigStore(get_table("search_config"))
+    return _search_config_store
+
+def flush_search_config():
+    """Write pending search config changes back to storage"""
+    if _search_config_store is not None:
+        _search_config_store.flush()
 
 def load_search_config():
     """Load search configurations from CSV file"""
-    if not os.path.exists(SEARCH_CONFIG_FILE):
+    store = get_search_config_store()
+    if not store.exists:
         raise FileNotFoundError(f"Search configuration file {SEARCH_CONFIG_FILE} not found")
     
     searches = []
-    with open(SEARCH_CONFIG_FILE, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            # Only include searches that are not marked to skip
-            if row["Skip?"].lower() != "yes":
-                searches.append({
-                    "city": row["city"],
-                    "coords": f"{row['lat']},{row['lng']}",  # Combine lat and lng into a single coordinate string
-                    "radius": int(row["radius"]),
-                    "query": row["query"]
-                })
+    # Only include searches that are not marked to skip
+    for city, lat, lng, radius, query in store.active_searches():
+        searches.append({
+            "city": city,
+            "coords": f"{lat},{lng}",  # Combine lat and lng into a single coordinate string
+            "radius": radius,
+            "query": query
+        })
     return searches
 
+# Loaded once per run on first use, then kept current by log_search
+_search_log_index = None
+
+@serialized
+def get_search_log_index():
+    """Return the in-memory index of completed searches, loading it on first use"""
+    global _search_log_index
+    if _search_log_index is None:
+        _search_log_index = SearchLogIndex.from_rows(get_table("search_log").rows())
+    return _search_log_index
+
+# Circles already searched without saturating, loaded on first use
+_coverage_index = None
+
+@serialized
+def get_coverage_index():
+    """Return the coverage grid over past searches, loading it on first use"""
+    global _coverage_index
+    if _coverage_index is None:
+        _coverage_index = CoverageIndex.from_rows(get_table("search_log").rows(), get_table("optimal_radii").rows())
+    return _coverage_index
+
 def has_already_searched(query, city, lat, lng, radius):
-    if not os.path.exists(SEARCH_LOG_FILE):
-        return False
-    with open(SEARCH_LOG_FILE, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            if (
-                row["query"] == query and
-                row["city"] == city and
-                abs(float(row["lat"]) - float(lat)) < 0.0001 and
-                abs(float(row["lng"]) - float(lng)) < 0.0001 and
-                int(row["radius_m"]) == radius
-            ):
-                return True  # ✅ Confirmed: this exact search was already *completed* and logged
-    return False  # Otherwise, let it run again
-
-
-def log_search(query, city, lat, lng, radius):
-    file_exists = os.path.exists(SEARCH_LOG_FILE)
-    with open(SEARCH_LOG_FILE, mode="a", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=["query", "city", "lat", "lng", "radius_m", "date"])
-        if not file_exists:
-            writer.writeheader()
-        writer.writerow({
-            "query": query,
-            "city": city,
-            "lat": lat,
-            "lng": lng,
-            "radius_m": radius,
-            "date": time.strftime("%Y-%m-%d")
-        })
+    # ✅ Confirmed if this exact search was already *completed* and logged
+    return get_search_log_index().contains(query, city, lat, lng, radius)
+
+
+@serialized
+def log_search(query, city, lat, lng, radius, results=None):
+    # Older search logs without a results column just don't get one
+    get_table("search_log").append([{
+        "query": query,
+        "city": city,
+        "lat": lat,
+        "lng": lng,
+        "radius_m": radius,
+        "date": time.strftime("%Y-%m-%d"),
+        "results": "" if results is None else results
+    }])
+    get_search_log_index().add(query, city, lat, lng, radius)
+    if results is not None:
+        get_radius_predictor().add(query, lat, lng, radius, results)
+        if results < SATURATED_RESULTS:
+            get_coverage_index().add(query, lat, lng, radius)
 
 
 
 # ----------------------
 # USAGE TRACKING
 # ----------------------
+# Usage per month and SKU, kept in memory and flushed under a file lock; loaded on first use
+_quota_ledger = None
+
+@serialized
+def get_quota_ledger():
+    """Return the usage ledger, reading it (and importing usage_counter.txt) on first use"""
+    global _quota_ledger
+    if _quota_ledger is None:
+        _quota_ledger = QuotaLedger(FILES["usage_ledger"], COUNTER_FILE)
+    return _quota_ledger
+
+def flush_quota_ledger():
+    """Write pending usage to the ledger file"""
+    if _quota_ledger is not None:
+        _quota_ledger.flush()
+
 def get_usage_count():
-    if os.path.exists(COUNTER_FILE):
-        with open(COUNTER_FILE, "r") as f:
-            return int(f.read().strip())
-    return 0
+    """API calls made this month, across all runs"""
+    return get_quota_ledger().used()
+
+def increment_usage(count, sku="text_search"):
+    get_quota_ledger().record(sku, count)
 
-def increment_usage(count):
-    current = get_usage_count()
-    with open(COUNTER_FILE, "w") as f:
-        f.write(str(current + count))
+def reserve_quota(requests_needed):
+    """Hold requests_needed calls against the monthly quota; False if they do not fit"""
+    return get_quota_ledger().reserve(requests_needed, MAX_MONTHLY_QUOTA)
 
-def is_quota_available(requests_needed):
-    return get_usage_count() + requests_needed <= MAX_MONTHLY_QUOTA
+def release_quota(requests_needed):
+    get_quota_ledger().release(requests_needed)
 
 def get_quota_usage():
     """Get current quota usage and remaining"""
@@ -107,7 +212,8 @@ def get_quota_usage():
     return {
         "current_usage": current_usage,
         "remaining": remaining,
-        "usage_percent": usage_percent
+        "usage_percent": usage_percent,
+        "by_sku": get_quota_ledger().by_sku()
     }
 
 def estimate_total_cost():
@@ -153,14 +259,37 @@ def estimate_total_cost():
 # EMAIL SCRAPER
 # ----------------------
 def extract_email_from_website(url):
+    cached = scrape_cache.lookup(url)
+    if cached and cached["fresh"]:
+        scrape_cache.record_hit(url)
+        return cached["email"]
+
     try:
-        response = requests.get(url, timeout=10, headers={'User-Agent': 'Mozilla/5.0'})
-        soup = BeautifulSoup(response.text, 'html.parser')
-        emails = set(re.findall(r'[\w\.-]+@[\w\.-]+\.\w+', soup.get_text()))
-        return list(emails)[0] if emails else ""
+        response = http_get(url, timeout=10, headers=scrape_cache.conditional_headers(cached), stream=True)
+        if response.status_code == 304 and cached:
+            response.close()
+            scrape_cache.record_not_modified(url)
+            return cached["email"]
+        # Read at most SCRAPE_MAX_BYTES and stop as soon as an address turns up
+        scan = scan_response(response, max_bytes=SCRAPE_MAX_BYTES)
+        email = email_from_scan(scan)
+        if not email and response.ok:
+            # Nothing on the homepage - try its contact pages before giving up on this Details call
+            homepage = bytes(scan.raw).decode(response.encoding or "utf-8", errors="replace")
+            email = crawl_contact_pages(
+                response.url or url,
+                homepage,
+                lambda page_url: http_get(page_url, timeout=10, stream=True),
+                page_budget=CONTACT_PAGE_BUDGET,
+                byte_budget=CONTACT_BYTE_BUDGET
+            )
+        if response.ok:
+            scrape_cache.store(url, email, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        return email
     except Exception as e:
         print(f"❌ Failed to scrape email from {url}: {e}")
-        return ""
+        # A stale answer beats none when the site is down
+        return cached["email"] if cached else ""
 
 # ----------------------
 # PLACE DETAILS API CALL
@@ -172,11 +301,14 @@ def get_place_website(place_id):
         "key": API_KEY
     }
     try:
-        # Add delay before each details request
-        time.sleep(2)
-        response = requests.get(DETAILS_URL, params=params)
+        # Wait only if we are ahead of the Details rate limit
+        get_limiter("details").acquire()
+        response = http_get(DETAILS_URL, params=params)
+        increment_usage(1, "details")
         data = response.json()
         website = data.get("result", {}).get("website", "")
+        if data.get("status") == "OK":
+            details_cache.put(place_id, website)
         return website
     except Exception as e:
         print(f"❌ Failed to fetch website for {place_id}: {e}")
@@ -185,36 +317,10 @@ def get_place_website(place_id):
 # ----------------------
 # GOOGLE PLACES SEARCH (1st page only, with pagination commented)
 # ----------------------
+@serialized
 def is_store_in_master_list(name, address, city):
-    """Check if a store already exists in the master list"""
-    if not os.path.exists(OUTPUT_CSV):
-        return False
-        
-    with open(OUTPUT_CSV, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            if (row["name"].strip().lower() == name.strip().lower() and
-                row["address"].strip().lower() == address.strip().lower() and
-                row["city"].strip().lower() == city.strip().lower()):
-                return True
-    return False
-
-def load_excluded_retailers():
-    """Load the list of retailers to exclude from scraping"""
-    excluded_retailers = set()
-    try:
-        with open(FILES["excluded_retailers"], newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                excluded_retailers.add(row["retailer_name"].strip().lower())
-    except FileNotFoundError:
-        print("⚠️ Warning: excluded_retailers.csv not found. No retailers will be excluded.")
-    return excluded_retailers
-
-def is_excluded_retailer(name, excluded_retailers):
-    """Check if a store name matches any excluded retailer"""
-    name_lower = name.strip().lower()
-    return any(excluded.lower() in name_lower for excluded in excluded_retailers)
+    """Check if a store already exists in the master list (a keyed lookup on either backend)"""
+    return get_table("master_list").has_key({"name": name, "address": address, "city": city})
 
 def find_stores(query, location, city_label, radius=50000):
     params = {
@@ -225,14 +331,19 @@ def find_stores(query, location, city_label, radius=50000):
     }
 
     all_stores = []
+    result_coords = []  # Where every result sits, for density-aware subdivision
     page = 1
     total_results = 0
     skipped_scrapes = 0
     excluded_count = 0
     api_calls = 0  # Track API calls
+    cached_details = 0
+    page_gate = PageTokenGate()
+    page_token_retries = 0
+    network_errors = 0
     
-    # Load excluded retailers
-    excluded_retailers = load_excluded_retailers()
+    # Load excluded retailers (compiled once, cached until the CSV changes)
+    excluded_retailers = load_exclusion_matcher()
     
     # Extract coordinates for location identifier
     lat, lng = map(float, location.split(","))
@@ -242,14 +353,23 @@ def find_stores(query, location, city_label, radius=50000):
         print(f"\n🔍 Search Location: {city_label} ({lat:.4f}, {lng:.4f})")
         print(f"📄 Searching page {page} for '{query}'...")
         try:
-            # Add delay between requests
+            # Page tokens need a moment after they are issued before Google accepts them
             if page > 1:
-                print("⏳ Waiting 5 seconds before next request...")
-                time.sleep(5)
+                page_gate.wait()
+            get_limiter("text_search").acquire()
                 
-            response = requests.get(PLACES_URL, params=params)
+            response = http_get(PLACES_URL, params=params)
             api_calls += 1  # Count Places API call
+            increment_usage(1, "text_search")
             data = response.json()
+            network_errors = 0
+
+            if (page > 1 and data.get("status") == "INVALID_REQUEST" and
+                    page_token_retries < PAGE_TOKEN_MAX_RETRIES):
+                # Token not ready yet - back off briefly and try it again
+                page_token_retries += 1
+                throttled_sleep("page_token", PAGE_TOKEN_RETRY_DELAY)
+                continue
 
             if data.get("status") != "OK":
                 print("⚠️ Google API Error:", data.get("error_message", data.get("status")))
@@ -258,13 +378,17 @@ def find_stores(query, location, city_label, radius=50000):
             results = data.get("results", [])
             total_results += len(results)
             
+            to_scrape = []
             for r in results:
                 name = r.get("name")
                 address = r.get("formatted_address")
                 place_id = r.get("place_id")
+                result_location = r.get("geometry", {}).get("location", {})
+                if "lat" in result_location and "lng" in result_location:
+                    result_coords.append((result_location["lat"], result_location["lng"]))
 
                 # Skip excluded retailers
-                if is_excluded_retailer(name, excluded_retailers):
+                if excluded_retailers.matches(name):
                     print(f"⏩ Skipping excluded retailer: {name}")
                     excluded_count += 1
                     continue
@@ -275,12 +399,32 @@ def find_stores(query, location, city_label, radius=50000):
                     skipped_scrapes += 1
                     continue
 
-                # Add delay between detail requests
-                time.sleep(2)
-                website = get_place_website(place_id)
-                api_calls += 1  # Count Details API call
-                email = extract_email_from_website(website) if website else ""
-
+                to_scrape.append((name, address, place_id))
+
+            # Places already resolved in an earlier run, query or overlapping circle are free
+            cached_websites = {}
+            for _, _, place_id in to_scrape:
+                website = details_cache.get(place_id)
+                if website is not None:
+                    cached_websites[place_id] = website
+            cached_details += len(cached_websites)
+
+            def resolve_website(place_id):
+                if place_id in cached_websites:
+                    return cached_websites[place_id]
+                return get_place_website(place_id)
+
+            # Look up websites and scrape emails concurrently, merged back in result order
+            scraped = scrape_places(
+                [place_id for _, _, place_id in to_scrape],
+                resolve_website,
+                extract_email_from_website,
+                max_in_flight=SCRAPE_MAX_IN_FLIGHT,
+                max_per_host=SCRAPE_MAX_PER_HOST
+            )
+            api_calls += len(to_scrape) - len(cached_websites)  # Count billed Details API calls
+
+            for (name, address, _), (website, email) in zip(to_scrape, scraped):
                 all_stores.append({
                     "name": name,
                     "address": address,
@@ -294,7 +438,8 @@ def find_stores(query, location, city_label, radius=50000):
 
             next_page_token = data.get("next_page_token")
             if next_page_token:
-                time.sleep(3)  # Required by Google API
+                page_gate.issued()
+                page_token_retries = 0
                 params = {
                     "pagetoken": next_page_token,
                     "key": API_KEY
@@ -305,17 +450,21 @@ def find_stores(query, location, city_label, radius=50000):
                 break
 
         except requests.exceptions.RequestException as e:
+            network_errors += 1
+            delay = network_backoff(network_errors)
             print(f"⚠️ Network error: {e}")
-            print("Retrying in 10 seconds...")
-            time.sleep(10)  # Increased retry delay
+            print(f"Retrying in {delay:.0f} seconds...")
+            throttled_sleep("network_retry", delay)
             continue
 
     if skipped_scrapes > 0:
         print(f"\n💰 Saved {skipped_scrapes} website scrapes by checking master list")
     if excluded_count > 0:
         print(f"\n🚫 Skipped {excluded_count} excluded retailers")
+    if cached_details > 0:
+        print(f"\n💾 Reused {cached_details} cached place details")
     print(f"\n📊 API Calls made: {api_calls} (1 Places API + {api_calls - 1} Details API calls)")
-    return all_stores, total_results, api_calls
+    return all_stores, total_results, api_calls, result_coords
 
 
 # ----------------------
@@ -337,39 +486,46 @@ def is_duplicate(entry, existing_entries, current_search_only=True):
             return True
     return False
 
+@serialized
 def save_to_csv(stores, filename=OUTPUT_CSV):
-    file_exists = os.path.isfile(filename)
     fieldnames = ["sorted", "query", "city", "location_id", "coordinates", "name", "address", "website", "email", "flagged"]
 
     # Track duplicates within current search
     current_entries = []
     duplicates_found = 0
 
+    for store in stores:
+        row = {
+            "sorted": "false",
+            "query": store.get("query", ""),
+            "city": store.get("city", ""),
+            "location_id": store.get("location_id", ""),
+            "coordinates": store.get("coordinates", ""),
+            "name": store.get("name", ""),
+            "address": store.get("address", ""),
+            "website": store.get("website", ""),
+            "email": store.get("email", ""),
+            "flagged": ""
+        }
+        
+        # Check for duplicates within current search only
+        if is_duplicate(row, current_entries, current_search_only=True):
+            duplicates_found += 1
+            continue
+            
+        current_entries.append(row)
+
+    if filename == OUTPUT_CSV:
+        # The master list table keeps its key index in step with what we append
+        get_table("master_list").append(current_entries)
+        return
+
+    file_exists = os.path.isfile(filename)
     with open(filename, mode="a", newline="", encoding="utf-8") as f:
         writer = csv.DictWriter(f, fieldnames=fieldnames)
         if not file_exists:
             writer.writeheader()
-        for store in stores:
-            row = {
-                "sorted": "false",
-                "query": store.get("query", ""),
-                "city": store.get("city", ""),
-                "location_id": store.get("location_id", ""),
-                "coordinates": store.get("coordinates", ""),
-                "name": store.get("name", ""),
-                "address": store.get("address", ""),
-                "website": store.get("website", ""),
-                "email": store.get("email", ""),
-                "flagged": ""
-            }
-            
-            # Check for duplicates within current search only
-            if is_duplicate(row, current_entries, current_search_only=True):
-                duplicates_found += 1
-                continue
-                
-            current_entries.append(row)
-            writer.writerow(row)
+        writer.writerows(current_entries)
 
 
 # ----------------------
@@ -377,105 +533,57 @@ def save_to_csv(stores, filename=OUTPUT_CSV):
 # ----------------------
 def update_search_config_skip(city, lat, lng, query):
     """Update the Skip? flag to Yes in search_config.csv for a given search"""
-    if not os.path.exists(SEARCH_CONFIG_FILE):
-        return
-        
-    # Read all rows
-    rows = []
-    with open(SEARCH_CONFIG_FILE, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        fieldnames = reader.fieldnames
-        for row in reader:
-            # Update Skip? to Yes if this is the matching search
-            if (row["city"] == city and 
-                float(row["lat"]) == float(lat) and 
-                float(row["lng"]) == float(lng) and 
-                row["query"] == query):
-                row["Skip?"] = "Yes"
-            rows.append(row)
-    
-    # Write back all rows
-    with open(SEARCH_CONFIG_FILE, 'w', newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
+    get_search_config_store().set_skip(city, lat, lng, query)
 
+@serialized
 def save_optimal_radius(city, coords, query, radius, result_count):
-    """Save successful search parameters to optimal_radii.csv"""
-    file_exists = os.path.exists(OPTIMAL_RADII_FILE)
+    """Save successful search parameters to the optimal radii table"""
     lat, lng = map(float, coords.split(","))
-    with open(OPTIMAL_RADII_FILE, mode="a", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=["query", "city", "lat", "lng", "radius"])
-        if not file_exists:
-            writer.writeheader()
-        writer.writerow({
-            "query": query,
-            "city": city,
-            "lat": lat,
-            "lng": lng,
-            "radius": radius
-        })
+    get_table("optimal_radii").append([{
+        "query": query,
+        "city": city,
+        "lat": lat,
+        "lng": lng,
+        "radius": radius,
+        "results": result_count
+    }])
     
     # Update the Skip? flag in search_config.csv
     update_search_config_skip(city, lat, lng, query)
 
+@serialized
 def is_optimal_radius_saved(city, coords, query):
     """Check if we already have an optimal radius saved for this search"""
-    if not os.path.exists(OPTIMAL_RADII_FILE):
-        return False
     lat, lng = map(float, coords.split(","))
-    with open(OPTIMAL_RADII_FILE, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            if (row["city"] == city and 
-                float(row["lat"]) == lat and 
-                float(row["lng"]) == lng and 
-                row["query"] == query):
-                return True
-    return False
+    return get_table("optimal_radii").has_key({"city": city, "lat": lat, "lng": lng, "query": query})
 
 def update_search_config_status(city, lat, lng, query, status, new_radius=None):
     """Update the Status and optionally radius in search_config.csv for a given search"""
-    if not os.path.exists(SEARCH_CONFIG_FILE):
-        return
-        
-    # Read all rows
-    rows = []
-    with open(SEARCH_CONFIG_FILE, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        fieldnames = reader.fieldnames
-        for row in reader:
-            # Update Status and radius if this is the matching search
-            if (row["city"] == city and 
-                float(row["lat"]) == float(lat) and 
-                float(row["lng"]) == float(lng) and 
-                row["query"] == query):
-                row["Status"] = status
-                if new_radius is not None:
-                    row["radius"] = str(new_radius)
-            rows.append(row)
-    
-    # Write back all rows
-    with open(SEARCH_CONFIG_FILE, 'w', newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
+    get_search_config_store().set_status(city, lat, lng, query, status, new_radius)
 
 # ----------------------
 # MAIN LOGIC
 # ----------------------
+# Built from optimal_radii.csv and search_log.csv on first use, then kept current
+_radius_predictor = None
+
+@serialized
+def get_radius_predictor():
+    """Return the history-based radius predictor, loading it on first use"""
+    global _radius_predictor
+    if _radius_predictor is None:
+        _radius_predictor = RadiusPredictor.from_rows(get_table("optimal_radii").rows(), get_table("search_log").rows())
+    return _radius_predictor
+
 def find_optimal_radius(query, location, city_label, max_radius=50000, min_radius=1000, target_results=60):
     """
-    Binary search to find the optimal radius that yields close to but not exceeding target_results
+    Find the optimal radius that yields close to but not exceeding target_results.
+    With nearby history the predicted radius is probed first and only a narrow
+    bracket around it is searched; otherwise this is a binary search over the full range.
     """
-    current_radius = max_radius
-    min_radius_used = min_radius
-    max_radius_used = max_radius
-    best_radius = max_radius
-    best_result_count = 0
-    
-    while min_radius_used <= max_radius_used:
-        current_radius = (min_radius_used + max_radius_used) // 2
+    lat, lng = map(float, location.split(","))
+
+    def probe(current_radius):
         print(f"🔍 Testing radius {current_radius}m for {city_label}...")
         
         params = {
@@ -485,25 +593,34 @@ def find_optimal_radius(query, location, city_label, max_radius=50000, min_radiu
             "key": API_KEY
         }
         
-        response = requests.get(PLACES_URL, params=params)
+        get_limiter("text_search").acquire()
+        try:
+            response = http_get(PLACES_URL, params=params)
+        except requests.exceptions.RequestException as e:
+            print(f"⚠️ Network error: {e}")
+            return None
+        increment_usage(1, "text_search")
         data = response.json()
         
         if data.get("status") != "OK":
             print("⚠️ Google API Error:", data.get("error_message", data.get("status")))
-            return max_radius, 0  # Fallback to max radius on error
+            return None
         
-        result_count = len(data.get("results", []))
-        
-        if result_count <= target_results:
-            # This radius works, but let's try a larger one
-            best_radius = current_radius
-            best_result_count = result_count
-            min_radius_used = current_radius + 1
-        else:
-            # Too many results, try a smaller radius
-            max_radius_used = current_radius - 1
+        return len(data.get("results", []))
+
+    predictor = get_radius_predictor()
+    predicted = predictor.predict_radius(query, lat, lng, min_radius=min_radius, max_radius=max_radius)
+    if predicted is None:
+        best_radius, best_result_count, probes = binary_search_radius(probe, min_radius, max_radius, target_results)
+    else:
+        low, high = predictor.bracket(predicted, min_radius, max_radius)
+        print(f"📐 Predicted radius {predicted}m from nearby history (probing {low}-{high}m)")
+        best_radius, best_result_count, probes = predicted_search_radius(probe, predicted, low, high, target_results)
+
+    if best_radius is None:
+        return max_radius, 0  # Fallback to max radius on error
     
-    print(f"✅ Found optimal radius {best_radius}m for {city_label} with {best_result_count} results")
+    print(f"✅ Found optimal radius {best_radius}m for {city_label} with {best_result_count} results ({probes} probes)")
     return best_radius, best_result_count
 
 def run_search(query, location, city_label, radius=30000):
@@ -514,27 +631,39 @@ def run_search(query, location, city_label, radius=30000):
         print(f"\n⏩ Skipping '{query}' in {city_label} - optimal radius already saved")
         return 0, 0, "skipped", 0
 
-    if not is_quota_available(1):
+    # Hold the most this search can spend, so parallel workers cannot all start on the last of the quota
+    if not reserve_quota(CONFIG_CALL_BUDGET):
         print("🚫 Quota exceeded — skipping this query.")
         return 0, 0, "quota_exceeded", 0
 
     print(f"\n📍 Search Location: {city_label} ({lat:.4f}, {lng:.4f})")
     print(f"🔎 Searching '{query}' with radius {radius}m")
-    stores, total_results, api_calls = find_stores(query, location, city_label, radius)
+    try:
+        stores, total_results, api_calls, result_coords = find_stores(query, location, city_label, radius)
+    finally:
+        # The calls made are in the ledger now; hand the unused part of the hold back
+        release_quota(CONFIG_CALL_BUDGET)
 
     if stores:
         # Count how many new emails were added
         new_emails = sum(1 for store in stores if store.get("email"))
         save_to_csv(stores)
-        increment_usage(1)
         
         # Log the search for historical purposes
-        log_search(query, city_label, lat, lng, radius)
+        log_search(query, city_label, lat, lng, radius, total_results)
         
         # Check if we should subdivide this search area
         if should_subdivide(radius, total_results):
             print(f"🔄 Subdividing search area with {total_results} results...")
-            new_centers = get_subdivision_centers(lat, lng, radius)
+            if SUBDIVISION_MODE == "density":
+                new_centers = get_density_subdivision_centers(
+                    lat, lng, radius, result_coords, SUBDIVISION_MIN_RESULTS
+                )
+                skipped_sectors = len(get_subdivision_centers(lat, lng, radius)) - len(new_centers)
+                if skipped_sectors:
+                    print(f"💰 Skipped {skipped_sectors} child circles over sectors with no stores")
+            else:
+                new_centers = get_subdivision_centers(lat, lng, radius)
             
             # Add new search areas to the configuration
             for new_lat, new_lng, new_radius in new_centers:
@@ -552,7 +681,7 @@ def run_search(query, location, city_label, radius=30000):
             update_search_config_skip(city_label, lat, lng, query)
         else:
             # Determine status based on results
-            if total_results >= 60:
+            if total_results >= SATURATED_RESULTS:
                 status = "❌"
                 new_radius = radius  # Keep the same radius, don't reduce it
             else:
@@ -573,45 +702,44 @@ def run_search(query, location, city_label, radius=30000):
         print("No results found.")
         return 0, 0, "no_results", api_calls
 
+@serialized
 def add_search_to_config(city, lat, lng, radius, query):
     """Add a new search configuration to the search_config.csv file"""
-    if not os.path.exists(SEARCH_CONFIG_FILE):
-        # Create file with headers if it doesn't exist
-        with open(SEARCH_CONFIG_FILE, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(['Skip?', 'Status', 'city', 'lat', 'lng', 'radius', 'query'])
-    
-    # Read existing configurations
-    existing_configs = []
-    with open(SEARCH_CONFIG_FILE, 'r', newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        existing_configs = list(reader)
-    
-    # Check if this exact configuration already exists
-    for config in existing_configs:
-        if (config['city'] == city and
-            float(config['lat']) == lat and
-            float(config['lng']) == lng and
-            int(config['radius']) == radius and
-            config['query'] == query):
-            return  # Skip if already exists
-    
-    # Add new configuration
-    with open(SEARCH_CONFIG_FILE, 'a', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow(['No', '', city, lat, lng, radius, query])
+    # Drop or shrink circles that earlier searches for this query already cover
+    planned_radius = get_coverage_index().plan(query, lat, lng, radius, COVERAGE_DROP_THRESHOLD, COVERAGE_SHRINK)
+    if planned_radius is None:
+        print(f"⏩ Not queuing {radius}m circle at ({lat:.4f}, {lng:.4f}) - already covered by past searches")
+        return
+    if planned_radius != radius:
+        print(f"✂️ Shrinking {radius}m circle at ({lat:.4f}, {lng:.4f}) to {planned_radius}m - partly covered already")
+    # Skipped if this exact configuration already exists
+    get_search_config_store().add(city, lat, lng, planned_radius, query)
+
+def run_search_config(search):
+    """Run one entry from load_search_config (used directly or by the worker pool)"""
+    return run_search(
+        search["query"],
+        search["coords"],
+        search["city"],
+        search["radius"]
+    )
 
 # ----------------------
 # RUN ALL COMBINATIONS
 # ----------------------
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find shops with Google Places and scrape their emails")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of search configs to run at once (default: 1)")
+    args = parser.parse_args()
+
     # Get current quota usage
     quota = get_quota_usage()
     
     # Load search configurations
     try:
         search_configs = load_search_config()
-    except FileNotFoundError as e:
+    except (FileNotFoundError, ValueError) as e:
         print(f"Error: {e}")
         exit(1)
     
@@ -625,6 +753,8 @@ if __name__ == "__main__":
     print("=" * 50)
     print(f"Current API Usage: {quota['current_usage']:,} / {MAX_MONTHLY_QUOTA:,} requests ({quota['usage_percent']:.1f}% used)")
     print(f"Remaining requests: {quota['remaining']:,}")
+    for sku, count in sorted(quota["by_sku"].items()):
+        print(f"   - {sku}: {count:,}")
     print("-" * 50)
     print(f"Total new searches to run: {cost_estimate['total_searches']}")
     print(f"Estimated place details to fetch: {cost_estimate['estimated_details']}")
@@ -648,32 +778,49 @@ if __name__ == "__main__":
     search_results = {}
     total_api_calls = 0
     
-    for search in search_configs:
-        location_id = f"{search['city']}_{search['coords']}"
-        if location_id not in search_results:
-            search_results[location_id] = {
-                "queries": {}
+    try:
+        if args.workers > 1:
+            print(f"\n🧵 Running searches with {args.workers} workers")
+            outcomes = [None] * len(search_configs)
+            with ThreadPoolExecutor(max_workers=args.workers) as pool:
+                futures = {pool.submit(run_search_config, search): i for i, search in enumerate(search_configs)}
+                for future in as_completed(futures):
+                    i = futures[future]
+                    search = search_configs[i]
+                    try:
+                        outcomes[i] = (search, future.result())
+                    except Exception as e:
+                        # One failing config must not throw away the results of the others
+                        print(f"❌ Search '{search['query']}' in {search['city']} failed: {e}")
+                        outcomes[i] = (search, (0, 0, "error", 0))
+        else:
+            outcomes = ((search, run_search_config(search)) for search in search_configs)
+
+        # Combine every worker's results into one summary, in config order
+        for search, (total_results, new_emails, status, api_calls) in outcomes:
+            location_id = f"{search['city']}_{search['coords']}"
+            if location_id not in search_results:
+                search_results[location_id] = {
+                    "queries": {}
+                }
+            
+            total_api_calls += api_calls
+            
+            search_results[location_id]["queries"][search["query"]] = {
+                "total": total_results,
+                "emails": new_emails,
+                "status": status,
+                "radius": search["radius"],
+                "api_calls": api_calls
             }
-        
-        total_results, new_emails, status, api_calls = run_search(
-            search["query"],
-            search["coords"],
-            search["city"],
-            search["radius"]
-        )
-        
-        total_api_calls += api_calls
-        
-        search_results[location_id]["queries"][search["query"]] = {
-            "total": total_results,
-            "emails": new_emails,
-            "status": status,
-            "radius": search["radius"],
-            "api_calls": api_calls
-        }
+    finally:
+        # One write of search_config.csv for the whole run, even if it was interrupted
+        flush_search_config()
+        flush_quota_ledger()
 
     print("\n✨ Running listCleaner after scrape...")
-    process_master_list()
+    # Only the rows this run appended; python -m shop_finder.Scripts.listCleaner does a full pass
+    process_master_list(incremental=True)
 
     print("\n🗺️ Generating map of searched areas...")
     generate_search_map()
@@ -699,9 +846,11 @@ if __name__ == "__main__":
                 print(f"⏩ {query}: Search skipped - optimal radius already found")
             elif counts["status"] == "quota_exceeded":
                 print(f"🚫 {query}: Search skipped - quota exceeded")
+            elif counts["status"] == "error":
+                print(f"⚠️ {query}: Search failed - see the error above")
             elif counts["status"] == "no_results":
                 print(f"❌ {query}: No results found")
-            elif counts["total"] >= 60:
+            elif counts["total"] >= SATURATED_RESULTS:
                 print(f"❌ {query}: {counts['total']} results ({counts['emails']} with emails) - too many results, try smaller radius (current radius: {counts['radius']}m)")
                 print(f"   📊 API Calls: {counts['api_calls']} (1 Places API + {counts['api_calls'] - 1} Details API calls)")
             elif counts["total"] < 45 and counts["radius"] < 50000:
@@ -716,3 +865,23 @@ if __name__ == "__main__":
     print(f"   - Places API calls: {len(search_configs)}")
     print(f"   - Details API calls: {total_api_calls - len(search_configs)}")
 
+    cache_stats = details_cache.stats()
+    print(f"\n💾 Place details cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses ({cache_stats['hit_rate']:.1f}% hit rate)")
+    print(f"   - Saved ${cache_stats['hits'] * COST_PER_DETAILS:.2f} in Details API calls")
+
+    scrape_stats = scrape_cache.stats()
+    print(f"\n🌐 Website scrape cache: {scrape_stats['hits']} hits, {scrape_stats['misses']} misses ({scrape_stats['revalidated']} revalidated with a 304, {scrape_stats['hit_rate']:.1f}% served without a download)")
+    if scrape_stats["evicted"]:
+        print(f"   - Evicted {scrape_stats['evicted']} old entries")
+
+    contact_stats = crawl_stats.summary()
+    if contact_stats["sites"]:
+        print(f"\n📬 Contact page crawl: found emails on {contact_stats['sites_with_email']}/{contact_stats['sites']} sites ({contact_stats['hit_rate']:.1f}% hit rate)")
+        print(f"   - {contact_stats['pages_fetched']} pages fetched ({contact_stats['pages_per_site']:.1f} per site)")
+
+    throttle_stats = get_throttle_stats()
+    # Wall time with at least one search or scrape thread held back, not summed per thread
+    print(f"\n⏳ Time spent throttled: {get_throttled_time():.1f}s")
+    for name, seconds in sorted(throttle_stats.items()):
+        print(f"   - {name}: {seconds:.1f}s")
+
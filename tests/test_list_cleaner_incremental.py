@@ -0,0 +1,105 @@
+"""
+The incremental listCleaner pass (process_master_list(incremental=True))
+must leave the master list and the email split tables exactly as a full
+pass over the same history would, on both storage backends.
+
+run with: python -m pytest tests
+"""
+import contextlib
+import io
+
+import pytest
+
+from shop_finder.Scripts import storage
+from shop_finder.Scripts.listCleaner import process_master_list
+from shop_finder.Scripts.storage import STORE_FIELDS, get_table
+
+SPLIT_TABLES = ("master_list", "with_emails", "without_emails")
+
+
+def store_row(i, email="", city="Austin"):
+    return {
+        "sorted": "false", "query": "witch store", "city": city, "location_id": f"{city}_30.27_-97.74",
+        "coordinates": "30.27,-97.74", "name": f"Shop {i}", "address": f"{i} Main St",
+        "website": f"https://shop{i}.example", "email": email, "flagged": ""
+    }
+
+
+def first_run_rows():
+    return [store_row(i, f"hello@shop{i}.example" if i % 2 else "") for i in range(20)]
+
+
+def second_run_rows():
+    """New stores, one listed twice, plus stores the first run already sorted"""
+    rows = [store_row(i, f"Email: orders@shop{i}.example, sales@shop{i}.example" if i % 3 else "", "Denver")
+            for i in range(20, 35)]
+    rows.append(dict(rows[0], name=" SHOP 20", address="20 main st "))
+    rows += [dict(row, sorted="false") for row in first_run_rows()[:4]]
+    return rows
+
+
+@pytest.fixture(params=["csv", "sqlite"])
+def backend(request, tmp_path, monkeypatch):
+    """Run in an empty search_logs directory on the given backend, with fresh table objects"""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "shop_finder" / "search_logs").mkdir(parents=True)
+    (tmp_path / "fenclaw_search").mkdir()  # where listCleaner writes the clean files
+    monkeypatch.setattr(storage, "STORAGE_BACKEND", request.param)
+    storage._tables.clear()
+    yield request.param
+    for db in storage._databases.values():
+        db.conn.close()
+    storage._databases.clear()
+    storage._tables.clear()
+
+
+def run_cleaner(incremental):
+    with contextlib.redirect_stdout(io.StringIO()):
+        process_master_list(incremental=incremental)
+
+
+def snapshot():
+    return {name: list(get_table(name).rows()) for name in SPLIT_TABLES}
+
+
+def test_incremental_pass_matches_full_pass(backend):
+    master = get_table("master_list")
+    master.append(first_run_rows())
+    run_cleaner(incremental=False)
+    master.append(second_run_rows())
+
+    # Same history twice: once sorted incrementally, once with a full pass
+    before = {name: list(get_table(name).rows()) for name in SPLIT_TABLES}
+    run_cleaner(incremental=True)
+    incremental = snapshot()
+
+    for name, rows in before.items():
+        get_table(name).rewrite(rows, STORE_FIELDS)
+    run_cleaner(incremental=False)
+    full = snapshot()
+
+    assert incremental == full
+    assert len(full["with_emails"]) + len(full["without_emails"]) == 35
+    assert all(row["sorted"] == "true" for row in full["master_list"])
+
+
+class Unwritable:
+    """A cell value that fails to convert, like a disk that fills up halfway through the write"""
+
+    def __str__(self):
+        raise OSError("disk full")
+
+
+def test_replace_since_keeps_rows_when_the_write_fails(backend):
+    master = get_table("master_list")
+    master.append(first_run_rows())
+    run_cleaner(incremental=False)
+    master.append(second_run_rows())
+    before = list(master.rows())
+
+    sorted_tail = [dict(row, sorted="true") for row in before[20:]]
+    sorted_tail[-1]["email"] = Unwritable()
+    with pytest.raises(OSError):
+        master.replace_since(master.read_watermark(), sorted_tail, STORE_FIELDS, same_keys=True)
+
+    assert list(master.rows()) == before